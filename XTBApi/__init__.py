@@ -1,41 +1,91 @@
-import logging.config
+import logging
 import os.path
 
 from XTBApi.__version__ import __version__
 
-logging.config.dictConfig({
-    'version': 1,
-    'disable_existing_loggers': False,
-    'formatters': {
-        'deafult': {
-            'format':
-                '%(asctime)s - %(levelname)s - %(name)s - %(message)s',
-            'datefmt': '%Y-%m-%d %H:%M:%S'
-        }
-    },
-    'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'deafult',
+# the library stays silent until the application configures logging,
+# either on its own or through setup_logging()
+logging.getLogger('XTBApi').addHandler(logging.NullHandler())
+
+DEFAULT_LOGFILE = os.path.join(os.path.dirname(__file__), 'logs/logfile.log')
+
+
+_queue_listener = None
+
+
+def setup_logging(filename=DEFAULT_LOGFILE, level='DEBUG', queued=False):
+    """configure the XTBApi loggers
+    writes to a file rotated at midnight, pass None as filename to
+    log only critical messages on console.
+    with queued the handlers run in a background thread so that
+    file I/O never blocks the calling thread"""
+    global _queue_listener
+    import logging.config
+    _stop_queue_listener()
+    config = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'deafult': {
+                'format':
+                    '%(asctime)s - %(levelname)s - %(name)s - %(message)s',
+                'datefmt': '%Y-%m-%d %H:%M:%S'
+            }
         },
-        'rotating': {
+        'handlers': {
+            'console': {
+                'class': 'logging.StreamHandler',
+                'formatter': 'deafult',
+                'level': 'CRITICAL',
+            }
+        },
+        'loggers': {
+            '': {
+                'handlers': ['console'],
+                'level': 'CRITICAL',
+                'propagate': True
+            },
+            'XTBApi': {
+                'handlers': [],
+                'level': level
+            }
+        }
+    }
+    if filename is not None:
+        config['handlers']['rotating'] = {
             'class': 'logging.handlers.TimedRotatingFileHandler',
             'formatter': 'deafult',
-            'filename': os.path.join(
-                os.path.dirname(__file__), 'logs/logfile.log'),
+            'filename': filename,
             'when': 'midnight',
             'backupCount': 3
         }
-    },
-    'loggers': {
-        '': {
-            'handlers': ['console'],
-            'level': 'CRITICAL',
-            'propagate': True
-        },
-        'XTBApi': {
-            'handlers': ['rotating'],
-            'level': 'DEBUG'
-        }
-    }
-})
+        config['loggers']['XTBApi']['handlers'].append('rotating')
+    logging.config.dictConfig(config)
+    if queued:
+        _queue_listener = _move_handlers_to_queue(logging.getLogger('XTBApi'))
+
+
+def _move_handlers_to_queue(log):
+    """replace the handlers of log with a QueueHandler feeding them"""
+    import atexit
+    import logging.handlers
+    import queue
+    log_queue = queue.SimpleQueue()
+    handlers = list(log.handlers)
+    for handler in handlers:
+        log.removeHandler(handler)
+    log.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.unregister(_stop_queue_listener)
+    atexit.register(_stop_queue_listener)
+    return listener
+
+
+def _stop_queue_listener():
+    """flush and stop the background logging thread if any"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
@@ -7,20 +7,30 @@ XTBApi.api
 Main module
 """
 
+import contextlib
 import enum
+import functools
 import json
 import logging
+import reprlib
+import threading
 import time
 from datetime import datetime
-from websocket import create_connection
-from websocket._exceptions import WebSocketConnectionClosedException
 
 import XTBApi.exceptions
+from XTBApi.modes import MODES
 
 
 logger = logging.getLogger()
 LOGIN_TIMEOUT = 120
 MAX_TIME_INTERVAL = 0.200
+QUOTES_CHUNK_SIZE = 200
+# response payloads are logged through a bounded repr
+_PAYLOAD_REPR = reprlib.Repr()
+_PAYLOAD_REPR.maxlevel = 3
+_PAYLOAD_REPR.maxlist = 5
+_PAYLOAD_REPR.maxdict = 10
+_PAYLOAD_REPR.maxstring = 80
 
 
 class STATUS(enum.Enum):
@@ -28,17 +38,6 @@ class STATUS(enum.Enum):
     NOT_LOGGED = enum.auto()
 
 
-class MODES(enum.Enum):
-    BUY = 0
-    SELL = 1
-    BUY_LIMIT = 2
-    SELL_LIMIT = 3
-    BUY_STOP = 4
-    SELL_STOP = 5
-    BALANCE = 6
-    CREDIT = 7
-
-
 class TRANS_TYPES(enum.Enum):
     OPEN = 0
     PENDING = 1
@@ -59,7 +58,65 @@ class PERIOD(enum.Enum):
     ONE_MONTH = 43200
 
 
-def _get_data(command, **parameters):
+_MODE_NAMES = {x.value: x.name for x in MODES}
+_TRANS_TYPE_NAMES = {x.value: x.name for x in TRANS_TYPES}
+_PERIOD_VALUES = frozenset(x.value for x in PERIOD)
+
+
+class _Payload(object):
+    """defer the repr of a payload until a log record is emitted"""
+    __slots__ = ('payload', '_text')
+
+    def __init__(self, payload):
+        self.payload = payload
+        self._text = None
+
+    def __str__(self):
+        # every handler formats the record, build the repr once
+        if self._text is None:
+            self._text = _PAYLOAD_REPR.repr(self.payload)
+        return self._text
+
+
+def _create_connection(url, **kwargs):
+    """open the websocket, websocket-client is imported on first use"""
+    from websocket import create_connection
+    return create_connection(url, **kwargs)
+
+
+def _connection_closed_exc():
+    """exceptions raised on a closed or dropped socket"""
+    try:
+        from websocket import WebSocketConnectionClosedException
+    except ImportError:  # no websocket-client, no websocket to close
+        return (ConnectionError,)
+    return (ConnectionError, WebSocketConnectionClosedException)
+
+
+def _timeout_exc():
+    """exceptions raised by a socket read or write timing out"""
+    import socket
+    try:
+        from websocket import WebSocketTimeoutException
+    except ImportError:
+        return (socket.timeout,)
+    return (socket.timeout, WebSocketTimeoutException)
+
+
+def _deadline_arg(method):
+    """add a deadline keyword argument to method, a time.monotonic()
+    value applying to every request sent while it runs"""
+    @functools.wraps(method)
+    def wrapper(self, *args, deadline=None, **kwargs):
+        if deadline is None:
+            return method(self, *args, **kwargs)
+        with self.deadline(deadline):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def get_data(command, **parameters):
+    """request dict of command with parameters as its arguments"""
     data = {
         "command": command,
     }
@@ -70,16 +127,28 @@ def _get_data(command, **parameters):
     return data
 
 
+def chart_range_info(symbol, period, start, end, ticks):
+    """info argument of getChartRangeRequest, start and end in seconds"""
+    if not isinstance(ticks, int):
+        raise ValueError(f"ticks value {ticks} must be int")
+    return {
+        "end": end * 1000,
+        "period": period,
+        "start": start * 1000,
+        "symbol": symbol,
+        "ticks": ticks
+    }
+
+
 def _check_mode(mode):
     """check if mode acceptable"""
-    modes = [x.value for x in MODES]
-    if mode not in modes:
+    if mode not in _MODE_NAMES:
         raise ValueError("mode must be in: ",mode)
 
 
 def _check_period(period):
     """check if period is acceptable"""
-    if period not in [x.value for x in PERIOD]:
+    if period not in _PERIOD_VALUES:
         raise ValueError("Period:", period, "not acceptable")
 
 
@@ -94,86 +163,337 @@ def _check_volume(volume):
         return volume
 
 
+def _parse_response(response, log):
+    """decode a response frame, return its returnData if any"""
+    res = json.loads(response)
+    if res['status'] is False:
+        raise XTBApi.exceptions.CommandFailed(res)
+    if 'returnData' in res.keys():
+        log.info("CMD: done")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s", _Payload(res['returnData']))
+        return res['returnData']
+    return None
+
+
+def _remaining(deadline):
+    return deadline - time.monotonic()
+
+
 class BaseClient(object):
-    """main client class"""
+    """main client class
+    pass a XTBApi.cache.ResponseCache as cache to serve read commands
+    from memory, set recorder to a XTBApi.recorder.SessionRecorder to
+    log the exchanged frames. start_io_thread() makes it safe to share
+    between threads"""
 
-    def __init__(self):
+    def __init__(self, cache=None):
         self.ws = None
+        self.cache = cache
+        self.recorder = None
+        self.clock = None
         self._login_data = None
+        self.max_time_interval = MAX_TIME_INTERVAL
         self._time_last_request = time.time() - MAX_TIME_INTERVAL
         self.status = STATUS.NOT_LOGGED
+        self.request_timeout = None
+        self.connect_timeout = None
+        self.read_timeout = None
+        self._dispatcher = None
+        self._standby = None
+        # bumped every time a new socket replaces self.ws
+        self._generation = 0
+        self._call_options = threading.local()
+        self._deadlines = threading.local()
         logger.debug("BaseClient inited")
         self.logger = logging.getLogger('XTBApi.api.BaseClient')
 
     def _login_decorator(self, func, *args, **kwargs):
         if self.status == STATUS.NOT_LOGGED:
             raise XTBApi.exceptions.NotLogged()
+        generation = self._generation
         try:
             return func(*args, **kwargs)
+        except (XTBApi.exceptions.RequestTimeout,
+                XTBApi.exceptions.ReplayMismatch,
+                XTBApi.exceptions.IOThreadStopped):
+            # logging in again would not help, a replay restarts from the top
+            raise
         except XTBApi.exceptions.SocketError:
             logger.info("re-logging in due to LOGIN_TIMEOUT gone")
-            self.login(self._login_data[0], self._login_data[1])
+            self._relogin(generation)
             return func(*args, **kwargs)
         except Exception as exc:
             logger.warning(exc)
-            self.login(self._login_data[0], self._login_data[1])
+            self._relogin(generation)
             return func(*args, **kwargs)
 
+    def _relogin(self, generation):
+        """swap in the standby session if ready, else log in again
+        nothing to do if another command replaced the socket used at
+        generation in the meantime"""
+        def _job(deadline):
+            if self._generation != generation:
+                return
+            if self._use_standby():
+                logger.info("switched to the standby session")
+                return
+            user_id, password, mode = self._login_data
+            self._login_session(user_id, password, mode, deadline)
+        self._run_io(_job, "login")
+
+    def _use_standby(self):
+        standby = self._standby
+        ws = standby.take() if standby is not None else None
+        if ws is None:
+            return False
+        self.reset_connection()
+        self.ws = ws
+        self._generation += 1
+        return True
+
     def _send_command(self, dict_data):
         """send command to api"""
+        return _parse_response(self._send_command_raw(dict_data), self.logger)
+
+    def start_io_thread(self):
+        """thread-safe mode, one thread owns the socket and serves the
+        commands of every thread in priority order"""
+        from XTBApi.dispatcher import Dispatcher
+        if self._dispatcher is None:
+            self._dispatcher = Dispatcher()
+
+    @property
+    def thread_safe(self):
+        """True between start_io_thread() and stop_io_thread()"""
+        return self._dispatcher is not None
+
+    def stop_io_thread(self):
+        """back to commands sent from the calling thread"""
+        dispatcher, self._dispatcher = self._dispatcher, None
+        if dispatcher is not None:
+            dispatcher.stop()
+
+    def sync_clock(self, samples=None, interval=None):
+        """use the server clock for the time dependent helpers
+        see XTBApi.clock.ServerClock for the defaults"""
+        from XTBApi.clock import DEFAULT_INTERVAL, DEFAULT_SAMPLES, ServerClock
+        if samples is None:
+            samples = DEFAULT_SAMPLES
+        if interval is None:
+            interval = DEFAULT_INTERVAL
+        self.clock = ServerClock(self, samples, interval)
+        return self.clock.sync()
+
+    def server_now(self):
+        """timestamp in seconds, of the server once sync_clock() called"""
+        if self.clock is None:
+            return time.time()
+        return self.clock.server_now()
+
+    def start_standby(self, ping_interval=None):
+        """keep a second session logged in, swapped in at once when the
+        socket drops. see XTBApi.standby.StandbySession"""
+        from XTBApi.standby import DEFAULT_PING_INTERVAL, StandbySession
+        if self._login_data is None:
+            raise XTBApi.exceptions.NotLogged()
+        if ping_interval is None:
+            ping_interval = DEFAULT_PING_INTERVAL
+        if self._standby is None:
+            user_id, password, mode = self._login_data
+            self._standby = StandbySession(
+                lambda: self._connect(mode, self.connect_timeout),
+                get_data("login", userId=user_id, password=password),
+                ping_interval, self.read_timeout)
+
+    def stop_standby(self):
+        standby, self._standby = self._standby, None
+        if standby is not None:
+            standby.stop()
+
+    @contextlib.contextmanager
+    def call_options(self, priority=None, timeout=None):
+        """priority and timeout of the commands sent by this thread
+        inside the block, used in thread-safe mode"""
+        previous = getattr(self._call_options, 'value', (None, None))
+        self._call_options.value = (priority, timeout)
+        try:
+            yield self
+        finally:
+            self._call_options.value = previous
+
+    @contextlib.contextmanager
+    def deadline(self, deadline):
+        """requests sent by this thread inside the block must complete
+        before deadline, a time.monotonic() value. nested blocks keep the
+        earliest deadline"""
+        previous = getattr(self._deadlines, 'value', None)
+        if previous is not None:
+            deadline = min(deadline, previous)
+        self._deadlines.value = deadline
+        try:
+            yield self
+        finally:
+            self._deadlines.value = previous
+
+    def call_context(self):
+        """(deadline, priority, timeout) set for the calling thread by
+        deadline() and call_options(), None when not set"""
+        priority, timeout = getattr(self._call_options, 'value', (None, None))
+        return getattr(self._deadlines, 'value', None), priority, timeout
+
+    def _run_io(self, job, command):
+        """run job(deadline) where the socket is owned"""
+        deadline = getattr(self._deadlines, 'value', None)
+        dispatcher = self._dispatcher
+        if dispatcher is None:
+            return job(deadline)
+        from XTBApi.dispatcher import COMMAND_PRIORITIES, NORMAL_PRIORITY
+        priority, timeout = getattr(self._call_options, 'value', (None, None))
+        if priority is None:
+            priority = COMMAND_PRIORITIES.get(command, NORMAL_PRIORITY)
+        if timeout is None:
+            timeout = self.request_timeout
+        if deadline is not None:
+            remaining = _remaining(deadline)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        # the socket operations of the job end with the wait of the caller
+        job_deadline = deadline
+        if timeout is not None:
+            job_deadline = time.monotonic() + timeout
+            if deadline is not None:
+                job_deadline = min(deadline, job_deadline)
+        try:
+            return dispatcher.call(lambda: job(job_deadline), priority,
+                                   timeout, self.reset_connection)
+        except XTBApi.exceptions.RequestTimeout:
+            if deadline is not None and _remaining(deadline) <= 0:
+                raise XTBApi.exceptions.DeadlineExceeded(command) from None
+            raise
+
+    def _send_command_raw(self, dict_data):
+        """send command to api, return the response frame undecoded"""
+        return self._run_io(
+            lambda deadline: self._exchange(dict_data, deadline),
+            dict_data['command'])
+
+    def _socket_timeout(self, default, deadline):
+        """default bounded by the time left to deadline"""
+        if deadline is None:
+            return default
+        remaining = _remaining(deadline)
+        if remaining <= 0:
+            raise XTBApi.exceptions.DeadlineExceeded()
+        return remaining if default is None else min(default, remaining)
+
+    def reset_connection(self):
+        """drop the socket, the next command logs in again"""
+        ws, self.ws = self.ws, None
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception as exc:  # pylint: disable=broad-except
+                self.logger.debug("closing socket: %s", exc)
+
+    def _exchange(self, dict_data, deadline=None):
+        """one request and response on the socket"""
         time_interval = time.time() - self._time_last_request
         self.logger.debug("took %s s.", time_interval)
-        if time_interval < MAX_TIME_INTERVAL:
-            time.sleep(MAX_TIME_INTERVAL - time_interval)
+        if time_interval < self.max_time_interval:
+            wait = self.max_time_interval - time_interval
+            if deadline is not None and _remaining(deadline) < wait:
+                raise XTBApi.exceptions.DeadlineExceeded(dict_data['command'])
+            time.sleep(wait)
+        if self.ws is None:
+            raise XTBApi.exceptions.SocketError()
+        timeout = self._socket_timeout(self.read_timeout, deadline)
+        if hasattr(self.ws, 'settimeout'):
+            self.ws.settimeout(timeout)
+        frame = json.dumps(dict_data)
+        sent = time.monotonic()
         try:
-            self.ws.send(json.dumps(dict_data))
+            self.ws.send(frame)
             response = self.ws.recv()
-        except WebSocketConnectionClosedException as exc:
+        except _connection_closed_exc() as exc:
             raise XTBApi.exceptions.SocketError() from exc
+        except _timeout_exc() as exc:
+            # a late answer would be read as the next response
+            self.reset_connection()
+            if deadline is not None and _remaining(deadline) <= 0:
+                raise XTBApi.exceptions.DeadlineExceeded(
+                    dict_data['command']) from exc
+            raise XTBApi.exceptions.RequestTimeout(timeout) from exc
 
         self._time_last_request = time.time()
-        res = json.loads(response)
-        if res['status'] is False:
-            raise XTBApi.exceptions.CommandFailed(res)
-        if 'returnData' in res.keys():
-            self.logger.info("CMD: done")
-            self.logger.debug(res['returnData'])
-            return res['returnData']
+        if self.recorder is not None:
+            self.recorder.record(frame, response, sent, time.monotonic())
+        return response
 
     def _send_command_with_check(self, dict_data):
         """with check login"""
+        if self.cache is not None:
+            return self.cache.fetch(dict_data, lambda: self._login_decorator(
+                self._send_command, dict_data),
+                getattr(self._deadlines, 'value', None))
         return self._login_decorator(self._send_command, dict_data)
 
+    def _send_command_raw_with_check(self, dict_data):
+        """with check login, return the response frame undecoded"""
+        return self._login_decorator(self._send_command_raw, dict_data)
+
+    def _connect(self, mode, timeout=None):
+        """open the socket to the server of mode"""
+        return _create_connection(f"wss://ws.xtb.com/{mode}", timeout=timeout)
+
+    def _open_session(self, mode, login_data, deadline=None):
+        self.reset_connection()
+        self.ws = self._connect(
+            mode, self._socket_timeout(self.connect_timeout, deadline))
+        self._generation += 1
+        return self._exchange(login_data, deadline)
+
+    def _login_session(self, user_id, password, mode, deadline=None):
+        """open a new socket and log in on it, where the socket is owned"""
+        data = get_data("login", userId=user_id, password=password)
+        response = _parse_response(
+            self._open_session(mode, data, deadline), self.logger)
+        self._login_data = (user_id, password, mode)
+        self.status = STATUS.LOGGED
+        return response
+
+    @_deadline_arg
     def login(self, user_id, password, mode='demo'):
         """login command"""
-        data = _get_data("login", userId=user_id, password=password)
-        self.ws = create_connection(f"wss://ws.xtb.com/{mode}")
-        response = self._send_command(data)
-        self._login_data = (user_id, password)
-        self.status = STATUS.LOGGED
+        response = self._run_io(
+            lambda deadline: self._login_session(user_id, password, mode,
+                                                 deadline), "login")
         self.logger.info("CMD: login...")
         return response
 
+    @_deadline_arg
     def logout(self):
         """logout command"""
-        data = _get_data("logout")
+        data = get_data("logout")
         response = self._send_command(data)
         self.status = STATUS.LOGGED
         self.logger.info("CMD: logout...")
         return response
 
+    @_deadline_arg
     def get_all_symbols(self):
         """getAllSymbols command"""
-        data = _get_data("getAllSymbols")
+        data = get_data("getAllSymbols")
         self.logger.info("CMD: get all symbols...")
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_calendar(self):
         """getCalendar command"""
-        data = _get_data("getCalendar")
+        data = get_data("getCalendar")
         self.logger.info("CMD: get calendar...")
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_chart_last_request(self, symbol, period, start):
         """getChartLastRequest command"""
         _check_period(period)
@@ -182,104 +502,108 @@ class BaseClient(object):
             "start": start * 1000,
             "symbol": symbol
         }
-        data = _get_data("getChartLastRequest", info=args)
+        data = get_data("getChartLastRequest", info=args)
         self.logger.info("CMD: get chart last request for %s of period %s from %s ...",
                          symbol, period, start)
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_chart_range_request(self, symbol, period, start, end, ticks):
         """getChartRangeRequest command"""
-        if not isinstance(ticks, int):
-            raise ValueError(f"ticks value {ticks} must be int")
-        args = {
-            "end": end * 1000,
-            "period": period,
-            "start": start * 1000,
-            "symbol": symbol,
-            "ticks": ticks
-        }
-        data = _get_data("getChartRangeRequest", info=args)
+        args = chart_range_info(symbol, period, start, end, ticks)
+        data = get_data("getChartRangeRequest", info=args)
         self.logger.info("CMD: get chart range request for %s of %s from %s to %s with ticks of %s",
                          symbol, period, start, end, ticks)
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_commission(self, symbol, volume):
         """getCommissionDef command"""
         volume = _check_volume(volume)
-        data = _get_data("getCommissionDef", symbol=symbol, volume=volume)
+        data = get_data("getCommissionDef", symbol=symbol, volume=volume)
         self.logger.info("CMD: get commission for %s of %i...", symbol, volume)
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_margin_level(self):
         """getMarginLevel command
         get margin information"""
-        data = _get_data("getMarginLevel")
+        data = get_data("getMarginLevel")
         self.logger.info("CMD: get margin level...")
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_margin_trade(self, symbol, volume):
         """getMarginTrade command
         get expected margin for volumes used symbol"""
         volume = _check_volume(volume)
-        data = _get_data("getMarginTrade", symbol=symbol, volume=volume)
+        data = get_data("getMarginTrade", symbol=symbol, volume=volume)
         self.logger.info("CMD: get margin trade for %s of %i...", symbol, volume)
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_profit_calculation(self, symbol, mode, volume, op_price, cl_price):
         """getProfitCalculation command
         get profit calculation for symbol with vol, mode and op, cl prices"""
         _check_mode(mode)
         volume = _check_volume(volume)
-        data = _get_data("getProfitCalculation", closePrice=cl_price,
-                         cmd=mode, openPrice=op_price, symbol=symbol,
-                         volume=volume)
+        data = get_data("getProfitCalculation", closePrice=cl_price,
+                        cmd=mode, openPrice=op_price, symbol=symbol,
+                        volume=volume)
         self.logger.info("CMD: get profit calculation for %s of %i from %f to %f in mode  %s...",
                          symbol, volume, op_price, cl_price, mode)
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_server_time(self):
         """getServerTime command"""
-        data = _get_data("getServerTime")
+        data = get_data("getServerTime")
         self.logger.info("CMD: get server time...")
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_symbol(self, symbol):
         """getSymbol command"""
-        data = _get_data("getSymbol", symbol=symbol)
+        data = get_data("getSymbol", symbol=symbol)
         self.logger.info("CMD: get symbol %s...", symbol)
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_tick_prices(self, symbols, start, level=0):
         """getTickPrices command"""
-        data = _get_data("getTickPrices", level=level, symbols=symbols,
-                         timestamp=start)
+        data = get_data("getTickPrices", level=level, symbols=symbols,
+                        timestamp=start)
         self.logger.info("CMD: get tick prices of %s from %s with level %s...",
                          symbols, start, level )
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_trade_records(self, trade_position_list):
         """getTradeRecords command
         takes a list of position id"""
-        data = _get_data("getTradeRecords", orders=trade_position_list)
+        data = get_data("getTradeRecords", orders=trade_position_list)
         self.logger.info("CMD: get trade records of length: %i", len(trade_position_list))
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_trades(self, opened_only=True):
         """getTrades command"""
-        data = _get_data("getTrades", openedOnly=opened_only)
+        data = get_data("getTrades", openedOnly=opened_only)
         self.logger.info("CMD: get trades...")
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_trades_history(self, start, end):
         """getTradesHistory command
         can take 0 as actual time"""
-        data = _get_data("getTradesHistory", end=end, start=start)
+        data = get_data("getTradesHistory", end=end, start=start)
         self.logger.info("CMD: get trades history from %s to %s...", start, end)
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_trading_hours(self, trade_position_list):
         """getTradingHours command"""
-        data = _get_data("getTradingHours", symbols=trade_position_list)
+        data = get_data("getTradingHours", symbols=trade_position_list)
         self.logger.info("CMD: get trading hours of lenght: %i", len(trade_position_list))
         response = self._send_command_with_check(data)
         for symbol in response:
@@ -291,23 +615,26 @@ class BaseClient(object):
                 day['toT'] = int(day['toT'] / 1000)
         return response
 
+    @_deadline_arg
     def get_version(self):
         """getVersion command"""
-        data = _get_data("getVersion")
+        data = get_data("getVersion")
         self.logger.info("CMD: get version...")
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def ping(self):
         """ping command"""
-        data = _get_data("ping")
+        data = get_data("ping")
         self.logger.info("CMD: get ping...")
         self._send_command_with_check(data)
 
+    @_deadline_arg
     def trade_transaction(self, symbol, mode, trans_type, volume, **kwargs):
         """tradeTransaction command"""
         # check type
-        if trans_type not in [x.value for x in TRANS_TYPES]:
-            raise ValueError(f"Type must be in {[x for x in trans_type]}")
+        if trans_type not in _TRANS_TYPE_NAMES:
+            raise ValueError(f"Type must be in {list(_TRANS_TYPE_NAMES)}")
         # check kwargs
         accepted_values = ['order', 'price', 'expiration', 'customComment',
                            'offset', 'sl', 'tp']
@@ -321,23 +648,23 @@ class BaseClient(object):
             'volume': volume
         }
         info.update(kwargs)  # update with kwargs parameters
-        data = _get_data("tradeTransaction", tradeTransInfo=info)
-        name_of_mode = [x.name for x in MODES if x.value == mode][0]
-        name_of_type = [x.name for x in TRANS_TYPES if x.value ==
-                        trans_type][0]
+        data = get_data("tradeTransaction", tradeTransInfo=info)
         self.logger.info("CMD: trade transaction of %s of mode %s with type %s of %i",
-                         symbol, name_of_mode, name_of_type, volume)
+                         symbol, _MODE_NAMES[mode], _TRANS_TYPE_NAMES[trans_type],
+                         volume)
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def trade_transaction_status(self, order_id):
         """tradeTransactionStatus command"""
-        data = _get_data("tradeTransactionStatus", order=order_id)
+        data = get_data("tradeTransactionStatus", order=order_id)
         self.logger.info("CMD: trade transaction status for %s", order_id)
         return self._send_command_with_check(data)
 
+    @_deadline_arg
     def get_user_data(self):
         """getCurrentUserData command"""
-        data = _get_data("getCurrentUserData")
+        data = get_data("getCurrentUserData")
         self.logger.info("CMD: get user data...")
         return self._send_command_with_check(data)
 
@@ -358,15 +685,19 @@ class Transaction(object):
 
 class Client(BaseClient):
     """advanced class of client"""
-    def __init__(self):
-        super().__init__()
+    def __init__(self, cache=None):
+        super().__init__(cache)
         self.trade_rec = {}
+        # trade_rec is refilled in place, threads sharing the client
+        # read and write it under this lock
+        self._trades_lock = threading.Lock()
         self.logger = logging.getLogger('XTBApi.api.Client')
         self.logger.info("Client inited")
 
+    @_deadline_arg
     def check_if_market_open(self, list_of_symbols):
         """check if market is open for symbol in symbols"""
-        _td = datetime.today()
+        _td = datetime.fromtimestamp(self.server_now())
         actual_tmsp = _td.hour * 3600 + _td.minute * 60 + _td.second
         response = self.get_trading_hours(list_of_symbols)
         market_values = {}
@@ -379,6 +710,7 @@ class Client(BaseClient):
                 market_values[symbol['symbol']] = False
         return market_values
 
+    @_deadline_arg
     def get_lastn_candle_history(self, symbol, timeframe_in_seconds, number):
         """get last n candles of timeframe"""
         acc_tmf = [60, 300, 900, 1800, 3600, 14400, 86400, 604800, 2592000]
@@ -386,12 +718,13 @@ class Client(BaseClient):
             raise ValueError(f"timeframe not accepted, not in "
                              f"{', '.join([str(x) for x in acc_tmf])}")
         sec_prior = timeframe_in_seconds * number
-        logger.debug("sym: %s, tmf: %s,%f",symbol, timeframe_in_seconds, time.time() - sec_prior)
+        now = self.server_now()
+        logger.debug("sym: %s, tmf: %s,%f",symbol, timeframe_in_seconds, now - sec_prior)
         res = {'rateInfos': []}
         while len(res['rateInfos']) < number:
             res = self.get_chart_last_request(symbol,
-                timeframe_in_seconds // 60, time.time() - sec_prior)
-            logger.debug(res)
+                timeframe_in_seconds // 60, now - sec_prior)
+            logger.debug("%s", _Payload(res))
             res['rateInfos'] = res['rateInfos'][-number:]
             sec_prior *= 3
         candle_history = []
@@ -405,16 +738,41 @@ class Client(BaseClient):
                 op_pr, 'close': cl_pr, 'high': hg_pr, 'low': lw_pr,
                                 'volume': candle['vol']}
             candle_history.append(new_candle_entry)
-        logger.debug(candle_history)
+        logger.debug("%s", _Payload(candle_history))
         return candle_history
 
+    @_deadline_arg
+    def get_quotes(self, symbols, since=0, chunk_size=QUOTES_CHUNK_SIZE):
+        """snapshot of quotes of symbols as a QuoteTable
+        with getTickPrices in chunks of chunk_size symbols, since is a
+        timestamp in seconds to get only the quotes changed after it"""
+        from XTBApi.quotes import QuoteTable
+        table = QuoteTable()
+        symbols = list(symbols)
+        for pos in range(0, len(symbols), chunk_size):
+            response = self.get_tick_prices(symbols[pos:pos + chunk_size],
+                                            int(since * 1000))
+            table.add_quotations(response['quotations'])
+        self.logger.info("got %i quotes of %i symbols", len(table), len(symbols))
+        return table
+
+    @_deadline_arg
+    def poll_quotes(self, table, chunk_size=QUOTES_CHUNK_SIZE):
+        """update table with the quotes changed since its last timestamp
+        returns the symbols changed"""
+        changed = self.get_quotes(table.symbols, table.last_timestamp,
+                                  chunk_size)
+        return table.update(changed)
+
+    @_deadline_arg
     def update_trades(self):
         """update trade list"""
         trades = self.get_trades()
-        self.trade_rec.clear()
-        for trade in trades:
-            obj_trans = Transaction(trade)
-            self.trade_rec[obj_trans.order_id] = obj_trans
+        with self._trades_lock:
+            self.trade_rec.clear()
+            for trade in trades:
+                obj_trans = Transaction(trade)
+                self.trade_rec[obj_trans.order_id] = obj_trans
         #values_to_del = [key for key, trad_not_listed in
         #                 self.trade_rec.items() if trad_not_listed.order_id
         #                 not in [x['order'] for x in trades]]
@@ -423,17 +781,21 @@ class Client(BaseClient):
         self.logger.info("updated %i trades", len(self.trade_rec))
         return self.trade_rec
 
+    @_deadline_arg
     def get_trade_profit(self, trans_id):
         """get profit of trade"""
         self.update_trades()
-        profit = self.trade_rec[trans_id].actual_profit
+        with self._trades_lock:
+            profit = self.trade_rec[trans_id].actual_profit
         self.logger.info("got trade profit of %s", profit)
         return profit
 
+    @_deadline_arg
     def open_trade(self, mode, symbol, volume =0, dollars=0, custom_message ="",
                    tp_per = 0.00, sl_per= 0.00, type_of_instrument ="",
                    order_margin_per = 0, expiration_stamp = 0):
         """open trade transaction"""
+        from XTBApi.sizing import round_to_step
         self.logger.debug("dollars = %s", dollars)
         if mode in [MODES.BUY.value, MODES.SELL.value]:
             mode = [x for x in MODES if x.value == mode][0]
@@ -462,16 +824,7 @@ class Client(BaseClient):
                 round_value = 2
             volume = round((dollars / price) , round_value)
         lot_step = self.get_symbol(symbol)['lotStep']
-        if lot_step == 0.01:
-            volume = round(volume, 2)
-        elif lot_step == 0.1:
-            volume = round(volume, 1)
-        elif lot_step == 1.0:
-            volume = round(volume, 0)
-        elif lot_step == 10.0:
-            volume = round(volume, -1)
-        elif lot_step == 100.0:
-            volume = round(volume, -2)
+        volume = round_to_step(volume, lot_step)
         sl, tp = self.get_tp_sl(mode, price, sl_per, tp_per)
         if tp_per == 0 and sl_per == 0:
             response = self.trade_transaction(symbol, mode, trans_type = 0,volume = volume,
@@ -524,6 +877,22 @@ class Client(BaseClient):
                 symbol, dollars, datetime.fromtimestamp(expiration_stamp/1000))
         return response
 
+    @_deadline_arg
+    def size_orders(self, symbols, sides, prices=None, dollars=None,
+                    volumes=None, sl_pers=None, tp_pers=None, specs=None):
+        """volumes, prices and SL/TP levels of a batch of orders
+        symbol records are read with one getAllSymbols when specs is not
+        given, see XTBApi.sizing.size_orders for the arguments"""
+        from XTBApi import sizing
+        if specs is None:
+            specs = {rec['symbol']: rec for rec in self.get_all_symbols()}
+        return sizing.size_orders(specs, symbols, sides, prices,
+                                  dollars, volumes, sl_pers, tp_pers)
+
+    def expiration_stamp(self, minutes):
+        """expiration in milliseconds for orders expiring in minutes"""
+        return int(self.server_now() + minutes * 60) * 1000
+
     def get_tp_sl(self, mode, price, sl_per, tp_per):
         self: self@Client
         if mode in (MODES.BUY.value, MODES.BUY_LIMIT.value):
@@ -534,6 +903,7 @@ class Client(BaseClient):
             tp = round(price * (1 - tp_per), 2)
         return sl, tp
 
+    @_deadline_arg
     def get_prices_operate(self, mode, symbol):
         conversion_mode = {MODES.BUY.value: 'ask', MODES.SELL.value: 'bid'}
         symbol_info = self.get_symbol(symbol)
@@ -548,6 +918,7 @@ class Client(BaseClient):
 
         return price, price_2
 
+    @_deadline_arg
     def manage_response(self, expiration_stamp, response):
         self.update_trades()
         status_rep = self.trade_transaction_status(response['order'])
@@ -568,7 +939,8 @@ class Client(BaseClient):
 
     def _close_trade_only(self, order_id):
         """faster but less secure"""
-        trade = self.trade_rec[order_id]
+        with self._trades_lock:
+            trade = self.trade_rec[order_id]
         self.logger.debug("Closing trade %s", order_id)
         try:
             response = self.trade_transaction(
@@ -587,6 +959,7 @@ class Client(BaseClient):
             raise XTBApi.exceptions.TransactionRejected(status)
         return response
 
+    @_deadline_arg
     def close_trade(self, trans):
         """close trade transaction"""
         if isinstance(trans, Transaction):
@@ -596,10 +969,12 @@ class Client(BaseClient):
         self.update_trades()
         return self._close_trade_only(order_id)
 
+    @_deadline_arg
     def close_all_trades(self):
         """close all trades"""
         self.update_trades()
-        self.logger.debug("closing %i trades", len(self.trade_rec))
-        trade_ids = self.trade_rec.keys()
+        with self._trades_lock:
+            trade_ids = list(self.trade_rec)
+        self.logger.debug("closing %i trades", len(trade_ids))
         for trade_id in trade_ids:
             self._close_trade_only(trade_id)
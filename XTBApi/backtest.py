@@ -0,0 +1,423 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.backtest
+~~~~~~~
+
+Simulated broker answering the API commands from historical data
+"""
+
+import heapq
+import json
+import logging
+import time
+
+from XTBApi.api import MODES, TRANS_TYPES, Client
+
+LOGGER = logging.getLogger('XTBApi.backtest')
+
+# tradeTransactionStatus request status
+ACCEPTED = 3
+REJECTED = 4
+
+DEFAULT_SPEC = {
+    'lotStep': 0.01,
+    'lotMin': 0.01,
+    'lotMax': 100.0,
+    'precision': 2,
+    'contractSize': 1,
+    'leverage': 100.0,
+    'spreadRaw': 0.0,
+    'shortSelling': True,
+    'currency': 'USD',
+    'categoryName': 'STC',
+}
+
+_BUY_MODES = (MODES.BUY.value, MODES.BUY_LIMIT.value, MODES.BUY_STOP.value)
+_PENDING_MODES = (MODES.BUY_LIMIT.value, MODES.SELL_LIMIT.value)
+
+
+class _Reject(Exception):
+    """order rejected with a tradeTransactionStatus message"""
+
+
+class _Failed(Exception):
+    """command failed with an error code"""
+    def __init__(self, err_code, descr):
+        self.err_code = err_code
+        self.descr = descr
+        super().__init__(descr)
+
+
+def _tagged(events, symbol):
+    for event in events:
+        yield event + (symbol,)
+
+
+class Broker(object):
+    """in-process simulated trading server
+
+    symbols maps each symbol to the keys of its getSymbol record that
+    differ from DEFAULT_SPEC, spreadRaw is added to bid prices to get ask
+    prices. slippage is the price distance every market fill moves
+    against the trader. load candles or ticks, then replay() them."""
+    def __init__(self, symbols, balance=10000.0, slippage=0.0):
+        self.specs = {name: dict(DEFAULT_SPEC, symbol=name, **spec)
+                      for name, spec in symbols.items()}
+        self.balance = balance
+        self.slippage = slippage
+        self.now = 0.0
+        self.prices = {}
+        self.positions = {}
+        self.pending = {}
+        self.history = []
+        self.statuses = {}
+        self._events = {name: [] for name in symbols}
+        self._candles = {name: [] for name in symbols}
+        self._last_order = 0
+
+    # -- market data --
+
+    def load_candles(self, symbol, candles):
+        """candles as returned by Client.get_lastn_candle_history
+        prices are bid prices, timestamps in seconds"""
+        spread = self.specs[symbol]['spreadRaw']
+        events = [(candle['timestamp'], candle['open'], candle['high'],
+                   candle['low'], candle['close'], spread,
+                   candle.get('volume', 0)) for candle in candles]
+        self._events[symbol] += events
+        self._events[symbol].sort()
+        self._candles[symbol] += events
+        self._candles[symbol].sort()
+
+    def load_ticks(self, symbol, ticks):
+        """ticks with timestamp in seconds, bid, ask and optional volume"""
+        for tick in ticks:
+            bid = tick['bid']
+            self._events[symbol].append(
+                (tick['timestamp'], bid, bid, bid, bid, tick['ask'] - bid,
+                 tick.get('volume', 0)))
+        self._events[symbol].sort()
+
+    def replay(self):
+        """apply the loaded data in time order, yield after each event
+        the clock and prices then show the end of that candle or tick"""
+        streams = [_tagged(events, symbol)
+                   for symbol, events in self._events.items()]
+        for event in heapq.merge(*streams):
+            self.apply(*event)
+            yield self.now
+
+    def apply(self, timestamp, open_, high, low, close, spread, volume,
+              symbol):
+        """move the market of symbol and trigger orders, sl and tp"""
+        self.now = timestamp
+        day_high, day_low = high, low
+        if symbol in self.prices:
+            last = self.prices[symbol]
+            if last['time'] // 86400 == timestamp // 86400:
+                day_high = max(high, last['high'])
+                day_low = min(low, last['low'])
+        self.prices[symbol] = {'bid': close, 'ask': close + spread,
+                               'high': day_high, 'low': day_low,
+                               'spread': spread, 'volume': volume,
+                               'time': timestamp}
+        self._fill_pending(symbol, open_, high, low, spread)
+        self._check_sl_tp(symbol, open_, high, low, spread)
+
+    def _fill_pending(self, symbol, open_, high, low, spread):
+        for order, trade in list(self.pending.items()):
+            if trade['symbol'] != symbol:
+                continue
+            if trade['expiration'] and self.now * 1000 >= trade['expiration']:
+                del self.pending[order]
+                continue
+            price = trade['open_price']
+            if trade['cmd'] == MODES.BUY_LIMIT.value and low + spread <= price:
+                fill = min(price, open_ + spread)
+            elif trade['cmd'] == MODES.SELL_LIMIT.value and high >= price:
+                fill = max(price, open_)
+            else:
+                continue
+            del self.pending[order]
+            trade['cmd'] -= 2  # limit to market mode
+            trade['open_price'] = self._round(symbol, fill)
+            trade['open_time'] = int(self.now * 1000)
+            self.positions[order] = trade
+
+    def _check_sl_tp(self, symbol, open_, high, low, spread):
+        for order, trade in list(self.positions.items()):
+            if trade['symbol'] != symbol:
+                continue
+            sl, tp = trade['sl'], trade['tp']
+            if trade['cmd'] == MODES.BUY.value:
+                if sl and low <= sl:
+                    self._close(order, trade['volume'], min(sl, open_))
+                elif tp and high >= tp:
+                    self._close(order, trade['volume'], max(tp, open_))
+            else:
+                if sl and high + spread >= sl:
+                    self._close(order, trade['volume'], max(sl, open_ + spread))
+                elif tp and low + spread <= tp:
+                    self._close(order, trade['volume'], min(tp, open_ + spread))
+
+    # -- accounting --
+
+    def _round(self, symbol, price):
+        return round(price, self.specs[symbol]['precision'])
+
+    def _profit(self, trade, price):
+        direction = 1 if trade['cmd'] in _BUY_MODES else -1
+        spec = self.specs[trade['symbol']]
+        return round(direction * (price - trade['open_price']) *
+                     trade['volume'] * spec['contractSize'], 2)
+
+    def _market_close_price(self, trade):
+        quote = self.prices[trade['symbol']]
+        if trade['cmd'] == MODES.BUY.value:
+            return quote['bid'] - self.slippage
+        return quote['ask'] + self.slippage
+
+    def _close(self, order, volume, price):
+        trade = self.positions[order]
+        price = self._round(trade['symbol'], price)
+        closed = dict(trade, volume=volume, close_price=price, closed=True,
+                      close_time=int(self.now * 1000))
+        closed['profit'] = self._profit(closed, price)
+        self.balance += closed['profit']
+        self.history.append(closed)
+        trade['volume'] = round(trade['volume'] - volume, 8)
+        if trade['volume'] <= 0:
+            del self.positions[order]
+        return closed
+
+    def equity(self):
+        return self.balance + sum(
+            self._profit(trade, self._market_close_price(trade))
+            for trade in self.positions.values())
+
+    def margin(self):
+        total = 0.0
+        for trade in self.positions.values():
+            spec = self.specs[trade['symbol']]
+            total += trade['open_price'] * trade['volume'] * \
+                spec['contractSize'] * spec['leverage'] / 100
+        return round(total, 2)
+
+    # -- orders --
+
+    def _check_volume(self, spec, volume):
+        steps = volume / spec['lotStep']
+        if abs(steps - round(steps)) > 1e-6 or \
+                not spec['lotMin'] <= volume <= spec['lotMax']:
+            raise _Reject('Invalid nominal')
+
+    def _check_sl_tp_levels(self, cmd, price, sl, tp):
+        if cmd in _BUY_MODES:
+            valid = (not sl or sl < price) and (not tp or tp > price)
+        else:
+            valid = (not sl or sl > price) and (not tp or tp < price)
+        if not valid:
+            raise _Reject('Invalid s/l or t/p price')
+
+    def _open(self, order, info):
+        symbol, cmd = info['symbol'], info['cmd']
+        spec = self.specs.get(symbol)
+        if spec is None:
+            raise _Failed('BE115', 'Symbol does not exist')
+        if symbol not in self.prices:
+            raise _Reject('Market closed')
+        if cmd not in _BUY_MODES and not spec['shortSelling']:
+            raise _Reject('Short selling not available')
+        self._check_volume(spec, info['volume'])
+        quote = self.prices[symbol]
+        sl, tp = info.get('sl', 0.0), info.get('tp', 0.0)
+        trade = {'order': order, 'order2': order, 'position': order,
+                 'symbol': symbol, 'cmd': cmd, 'volume': info['volume'],
+                 'sl': sl, 'tp': tp, 'closed': False, 'close_time': None,
+                 'customComment': info.get('customComment', ''),
+                 'comment': '', 'commission': 0.0, 'storage': 0.0,
+                 'digits': spec['precision'],
+                 'expiration': info.get('expiration', 0),
+                 'open_time': int(self.now * 1000)}
+        if cmd in _PENDING_MODES:
+            price = info['price']
+            if cmd == MODES.BUY_LIMIT.value and price >= quote['ask'] or \
+                    cmd == MODES.SELL_LIMIT.value and price <= quote['bid']:
+                raise _Reject('Invalid prices(limit)')
+            self._check_sl_tp_levels(cmd, price, sl, tp)
+            trade['open_price'] = self._round(symbol, price)
+            self.pending[order] = trade
+            return
+        if cmd == MODES.BUY.value:
+            price = quote['ask'] + self.slippage
+        elif cmd == MODES.SELL.value:
+            price = quote['bid'] - self.slippage
+        else:
+            raise _Failed('BE1', 'Mode not supported by the simulation')
+        self._check_sl_tp_levels(cmd, price, sl, tp)
+        trade['open_price'] = self._round(symbol, price)
+        self.positions[order] = trade
+
+    def _trade_transaction(self, info):
+        self._last_order += 1
+        order = self._last_order
+        trans_type = info['type']
+        try:
+            if trans_type == TRANS_TYPES.OPEN.value:
+                self._open(order, info)
+            elif trans_type == TRANS_TYPES.CLOSE.value:
+                if info.get('order') not in self.positions:
+                    raise _Failed('BE51', 'Order already closed')
+                trade = self.positions[info['order']]
+                self._close(info['order'], min(info['volume'], trade['volume']),
+                            self._market_close_price(trade))
+            elif trans_type == TRANS_TYPES.MODIFY.value:
+                trade = self.positions.get(info.get('order')) or \
+                    self.pending.get(info.get('order'))
+                if trade is None:
+                    raise _Failed('BE51', 'Order does not exist')
+                self._check_sl_tp_levels(trade['cmd'], trade['open_price'],
+                                         info.get('sl', 0.0), info.get('tp', 0.0))
+                trade.update(sl=info.get('sl', 0.0), tp=info.get('tp', 0.0))
+            elif trans_type == TRANS_TYPES.DELETE.value:
+                if self.pending.pop(info.get('order'), None) is None:
+                    raise _Failed('BE51', 'Order already closed')
+            else:
+                raise _Failed('BE1', 'Transaction type not supported')
+            self.statuses[order] = (ACCEPTED, None, info['symbol'])
+        except _Reject as exc:
+            self.statuses[order] = (REJECTED, str(exc), info['symbol'])
+        return {'order': order}
+
+    # -- commands --
+
+    def _symbol_record(self, symbol):
+        if symbol not in self.specs:
+            raise _Failed('BE115', 'Symbol does not exist')
+        record = dict(self.specs[symbol])
+        quote = self.prices.get(symbol)
+        if quote is not None:
+            record.update(bid=quote['bid'], ask=quote['ask'],
+                          high=quote['high'], low=quote['low'],
+                          time=int(quote['time'] * 1000))
+        return record
+
+    def _trade_record(self, trade):
+        price = self._market_close_price(trade) if trade['order'] in \
+            self.positions else trade['open_price']
+        return dict(trade, close_price=price, profit=self._profit(trade, price)
+                    if trade['order'] in self.positions else 0.0)
+
+    def _chart(self, info):
+        symbol = info['symbol']
+        digits = self.specs[symbol]['precision']
+        scale = 10 ** digits
+        end = info.get('end') or self.now * 1000
+        rates = []
+        for ctm, open_, high, low, close, _, vol in self._candles[symbol]:
+            if not info['start'] <= ctm * 1000 <= min(end, self.now * 1000):
+                continue
+            base = round(open_ * scale)
+            rates.append({'ctm': int(ctm * 1000), 'open': base,
+                          'close': round(close * scale) - base,
+                          'high': round(high * scale) - base,
+                          'low': round(low * scale) - base, 'vol': vol})
+        return {'digits': digits, 'rateInfos': rates}
+
+    def handle(self, request):
+        """answer a command as the server would"""
+        command = request['command']
+        args = request.get('arguments', {})
+        try:
+            if command == 'login':
+                return {'status': True, 'streamSessionId': 'backtest'}
+            if command in ('logout', 'ping'):
+                return {'status': True}
+            data = self._command(command, args)
+        except _Failed as exc:
+            return {'status': False, 'errorCode': exc.err_code,
+                    'errorDescr': exc.descr}
+        return {'status': True, 'returnData': data}
+
+    def _command(self, command, args):
+        if command == 'getSymbol':
+            return self._symbol_record(args['symbol'])
+        if command == 'getAllSymbols':
+            return [self._symbol_record(name) for name in self.specs]
+        if command == 'tradeTransaction':
+            return self._trade_transaction(args['tradeTransInfo'])
+        if command == 'tradeTransactionStatus':
+            status, message, symbol = self.statuses[args['order']]
+            quote = self.prices.get(symbol, {})
+            return {'order': args['order'], 'requestStatus': status,
+                    'message': message, 'customComment': None,
+                    'ask': quote.get('ask', 0.0), 'bid': quote.get('bid', 0.0)}
+        if command == 'getTrades':
+            trades = list(self.positions.values())
+            if not args.get('openedOnly', True):
+                trades += list(self.pending.values())
+            return [self._trade_record(trade) for trade in trades]
+        if command == 'getTradeRecords':
+            trades = dict(self.pending, **self.positions)
+            return [self._trade_record(trades[order])
+                    for order in args['orders'] if order in trades]
+        if command == 'getTradesHistory':
+            start, end = args['start'], args['end'] or self.now * 1000
+            return [trade for trade in self.history
+                    if start <= trade['close_time'] <= end]
+        if command == 'getMarginLevel':
+            equity, margin = round(self.equity(), 2), self.margin()
+            return {'balance': round(self.balance, 2), 'equity': equity,
+                    'margin': margin, 'margin_free': round(equity - margin, 2),
+                    'margin_level': round(equity / margin * 100, 2)
+                                    if margin else 0.0,
+                    'credit': 0.0, 'currency': 'USD'}
+        if command == 'getServerTime':
+            return {'time': int(self.now * 1000),
+                    'timeString': time.ctime(self.now)}
+        if command == 'getTickPrices':
+            return {'quotations': [
+                dict(self.prices[name], symbol=name, level=0,
+                     timestamp=int(self.prices[name]['time'] * 1000),
+                     spreadRaw=self.prices[name]['spread'],
+                     askVolume=0, bidVolume=0)
+                for name in args['symbols'] if name in self.prices and
+                self.prices[name]['time'] * 1000 > args['timestamp']]}
+        if command in ('getChartLastRequest', 'getChartRangeRequest'):
+            return self._chart(args['info'])
+        raise _Failed('BE1', f"{command} not supported by the simulation")
+
+
+class BrokerSocket(object):
+    """socket-like adapter passing the frames to a Broker"""
+    def __init__(self, broker):
+        self.broker = broker
+        self._response = None
+        self.connected = True
+
+    def send(self, frame):
+        self._response = json.dumps(self.broker.handle(json.loads(frame)))
+
+    def recv(self):
+        response, self._response = self._response, None
+        return response
+
+    def close(self):
+        self.connected = False
+
+
+class PaperClient(Client):
+    """Client trading against a simulated Broker instead of the server
+    strategies written for Client run unchanged, without throttling"""
+    def __init__(self, broker, cache=None):
+        super().__init__(cache)
+        self.broker = broker
+        self.max_time_interval = 0
+        self.logger = logging.getLogger('XTBApi.backtest.PaperClient')
+
+    def _connect(self, mode, timeout=None):
+        return BrokerSocket(self.broker)
+
+    def login(self, user_id='paper', password='', mode='paper'):
+        return super().login(user_id, password, mode)
@@ -0,0 +1,199 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.cache
+~~~~~~~
+
+Response cache for idempotent read commands
+"""
+
+import json
+import logging
+import shelve
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import XTBApi.exceptions
+
+LOGGER = logging.getLogger('XTBApi.cache')
+FOREVER = float('inf')
+
+
+def closed_range_ttl(arguments):
+    """cache a getChartRangeRequest only once its window is over
+    with ticks the server ignores end, the window ends ticks periods
+    after start or at start when ticks is negative"""
+    info = arguments['info']
+    ticks = info.get('ticks', 0)
+    if ticks > 0:
+        end = info['start'] / 1000 + ticks * info['period'] * 60
+    elif ticks < 0:
+        end = info['start'] / 1000
+    else:
+        end = info['end'] / 1000
+    if end and end <= time.time() - info['period'] * 60:
+        return FOREVER
+    return 0
+
+
+# seconds each command is kept, or callable(arguments) -> seconds
+DEFAULT_POLICIES = {
+    'getVersion': 24 * 3600,
+    'getCalendar': 300,
+    'getAllSymbols': 600,
+    'getTradingHours': 3600,
+    'getCommissionDef': 3600,
+    'getChartRangeRequest': closed_range_ttl,
+}
+
+
+class ShelveBackend(object):
+    """persistent backend storing the entries in a shelve file"""
+    def __init__(self, filename):
+        self._shelf = shelve.open(filename)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._shelf.get(key)
+
+    def set(self, key, entry):
+        with self._lock:
+            self._shelf[key] = entry
+            self._shelf.sync()
+
+    def close(self):
+        with self._lock:
+            self._shelf.close()
+
+
+class ResponseCache(object):
+    """LRU cache of command responses with per command TTL
+
+    policies maps a command to its time to live in seconds or to a
+    callable taking the command arguments and returning it, commands not
+    listed are never cached. Only entries living FOREVER are written to
+    the optional persistent backend.
+    concurrent identical requests share the same call to the server."""
+    def __init__(self, policies=None, maxsize=1024, backend=None):
+        self.policies = dict(DEFAULT_POLICIES if policies is None
+                             else policies)
+        self.maxsize = maxsize
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.evictions = 0
+
+    def _ttl(self, dict_data):
+        policy = self.policies.get(dict_data['command'], 0)
+        if callable(policy):
+            return policy(dict_data.get('arguments', {}))
+        return policy
+
+    def _count(self, command, event):
+        stats = self._stats.setdefault(
+            command, {'hits': 0, 'misses': 0, 'coalesced': 0})
+        stats[event] += 1
+
+    def _lookup(self, key):
+        """text of a live entry or None, lock must be held"""
+        entry = self._entries.get(key)
+        if entry is None and self.backend is not None:
+            entry = self.backend.get(key)
+            if entry is not None:
+                self._store(key, entry)
+        if entry is None:
+            return None
+        expires, text = entry
+        if expires < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return text
+
+    def _store(self, key, entry):
+        """lock must be held"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def fetch(self, dict_data, call, deadline=None):
+        """return the cached response of dict_data or call() for it
+        waiting for an identical request in flight at most until
+        deadline, a time.monotonic() value"""
+        ttl = self._ttl(dict_data)
+        if not ttl or ttl < 0:
+            return call()
+        command = dict_data['command']
+        key = json.dumps(dict_data, sort_keys=True)
+        with self._lock:
+            text = self._lookup(key)
+            if text is not None:
+                self._count(command, 'hits')
+                return json.loads(text)
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+                self._count(command, 'misses')
+            else:
+                self._count(command, 'coalesced')
+        if not owner:
+            timeout = None if deadline is None else \
+                max(0, deadline - time.monotonic())
+            try:
+                return json.loads(future.result(timeout))
+            except FutureTimeout:
+                raise XTBApi.exceptions.DeadlineExceeded(command) from None
+        try:
+            response = call()
+            text = json.dumps(response)
+        except BaseException as exc:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(exc)
+            raise
+        entry = (time.time() + ttl, text)
+        with self._lock:
+            self._store(key, entry)
+            del self._in_flight[key]
+        if ttl == FOREVER and self.backend is not None:
+            self.backend.set(key, entry)
+        future.set_result(text)
+        LOGGER.debug("cached %s for %s s.", command, ttl)
+        return response
+
+    def invalidate(self, command=None):
+        """drop the in-memory entries of command or all of them"""
+        with self._lock:
+            if command is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries
+                        if json.loads(k)['command'] == command]:
+                del self._entries[key]
+
+    def stats(self):
+        """hits, misses, coalesced requests and hit rate per command"""
+        with self._lock:
+            report = {}
+            for command, stats in self._stats.items():
+                total = sum(stats.values())
+                report[command] = dict(
+                    stats, hit_rate=(stats['hits'] + stats['coalesced']) / total)
+            return report
+
+    def hit_rate(self):
+        """overall share of requests served without a server call"""
+        with self._lock:
+            served = sum(s['hits'] + s['coalesced']
+                         for s in self._stats.values())
+            total = sum(sum(s.values()) for s in self._stats.values())
+        return served / total if total else 0.0
@@ -0,0 +1,95 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.clock
+~~~~~~~
+
+Server clock estimated from getServerTime
+"""
+
+import logging
+import threading
+import time
+
+import XTBApi.dispatcher
+
+LOGGER = logging.getLogger('XTBApi.clock')
+DEFAULT_SAMPLES = 5
+DEFAULT_INTERVAL = 600
+
+
+class ServerClock(object):
+    """estimate of the server clock
+
+    every sync sends samples getServerTime requests and keeps the one with
+    the shortest round trip, like NTP: offset = server - (sent + received)/2.
+    server_now() extrapolates the last sync with time.monotonic() and never
+    goes backwards. once the sync is interval seconds old it keeps
+    extrapolating while a full sync runs in the background in thread-safe
+    mode, otherwise it refreshes the offset with a single sample"""
+    def __init__(self, client, samples=DEFAULT_SAMPLES,
+                 interval=DEFAULT_INTERVAL):
+        self.client = client
+        self.samples = samples
+        self.interval = interval
+        self.offset = None
+        self.rtt = None
+        self._anchor = None
+        self._synced = None
+        self._last = 0.0
+        self._lock = threading.Lock()
+        self._resync = None
+
+    def sample(self):
+        """(offset, rtt) of one getServerTime request, in seconds"""
+        sent_mono, sent = time.monotonic(), time.time()
+        server = self.client.get_server_time()['time'] / 1000
+        rtt = time.monotonic() - sent_mono
+        return server - (sent + rtt / 2), rtt
+
+    def sync(self, samples=None):
+        """estimate the offset again, returns it"""
+        samples = self.samples if samples is None else samples
+        offset, rtt = min((self.sample() for _ in range(samples)),
+                          key=lambda sample: sample[1])
+        with self._lock:
+            self.offset, self.rtt = offset, rtt
+            self._anchor = (time.monotonic(), time.time() + offset)
+            self._synced = self._anchor[0]
+        LOGGER.debug("server clock offset %.3fs, rtt %.3fs", offset, rtt)
+        return offset
+
+    def is_stale(self):
+        return self._synced is None or \
+            time.monotonic() - self._synced > self.interval
+
+    def _sync_in_background(self):
+        with self._lock:
+            if self._resync is not None and self._resync.is_alive():
+                return
+            self._resync = threading.Thread(
+                target=self._background_sync, name='XTBApi-clock', daemon=True)
+            self._resync.start()
+
+    def _background_sync(self):
+        try:
+            with self.client.call_options(
+                    priority=XTBApi.dispatcher.LOW_PRIORITY):
+                self.sync()
+        except Exception as exc:  # pylint: disable=broad-except
+            LOGGER.warning("server clock sync failed: %s", exc)
+
+    def server_now(self):
+        """server timestamp in seconds, sends at most one request"""
+        if self._anchor is None:
+            self.sync(1)
+        elif self.is_stale():
+            if self.client.thread_safe:
+                self._sync_in_background()
+            else:
+                self.sync(1)
+        with self._lock:
+            mono, server = self._anchor
+            now = max(self._last, server + time.monotonic() - mono)
+            self._last = now
+        return now
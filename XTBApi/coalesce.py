@@ -0,0 +1,166 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.coalesce
+~~~~~~~
+
+Merge the read requests of many callers sharing one client
+"""
+
+import contextlib
+import copy
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+LOGGER = logging.getLogger('XTBApi.coalesce')
+DEFAULT_WINDOW = 0.020
+
+
+def _quotations_of(response, symbols):
+    return dict(response, quotations=[
+        quote for quote in response['quotations'] if quote['symbol'] in symbols])
+
+
+def _records_of(field):
+    def _filter(response, keys):
+        return [record for record in response if record[field] in keys]
+    return _filter
+
+
+def _tightest(contexts):
+    """earliest deadline, highest priority and shortest timeout"""
+    return tuple(min((value for value in column if value is not None),
+                     default=None) for column in zip(*contexts))
+
+
+# client methods whose first argument is a list merged in one request,
+# with the function extracting the part of the response of each caller
+MERGED = {
+    'get_tick_prices': _quotations_of,
+    'get_trading_hours': _records_of('symbol'),
+    'get_trade_records': _records_of('order'),
+}
+
+
+class Coalescer(object):
+    """collect the requests of many threads during window seconds then
+    send them together from one scheduler thread
+
+    identical calls are sent once, calls of the MERGED methods differing
+    only by their list are sent once with the union of the lists. every
+    caller gets its own copy of the result. the request is sent with the
+    earliest deadline() and the most urgent call_options() of its callers,
+    a merged request failing is sent again for each caller alone so that
+    an invalid symbol or order only fails its own caller."""
+    def __init__(self, client, window=DEFAULT_WINDOW):
+        self.client = client
+        self.window = window
+        self.requests = 0
+        self.sent = 0
+        self._batch = {}
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run,
+                                        name='XTBApi-coalesce', daemon=True)
+        self._thread.start()
+
+    def call(self, method, *args):
+        """result of client.method(*args), sent with the other requests
+        of the window"""
+        if method in MERGED:
+            keys, rest = list(args[0]), args[1:]
+            group = (method, 'merged') + rest
+        else:
+            keys, group = None, (method, 'same') + args
+        future = Future()
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("coalescer stopped")
+            context = self.client.call_context()
+            self.requests += 1
+            self._batch.setdefault(group, []).append((keys, future, context))
+            self._cond.notify()
+        return future.result()
+
+    def get_symbol(self, symbol):
+        return self.call('get_symbol', symbol)
+
+    def get_trades(self, opened_only=True):
+        return self.call('get_trades', opened_only)
+
+    def get_margin_level(self):
+        return self.call('get_margin_level')
+
+    def get_tick_prices(self, symbols, start, level=0):
+        return self.call('get_tick_prices', symbols, start, level)
+
+    def get_trading_hours(self, trade_position_list):
+        return self.call('get_trading_hours', trade_position_list)
+
+    def get_trade_records(self, trade_position_list):
+        return self.call('get_trade_records', trade_position_list)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._batch and not self._stopped:
+                    self._cond.wait()
+                if not self._batch:
+                    break
+            time.sleep(self.window)
+            with self._cond:
+                batch, self._batch = self._batch, {}
+            for group, waiters in batch.items():
+                self._send(group, waiters)
+        LOGGER.debug("coalescer stopped")
+
+    def _send(self, group, waiters):
+        method, kind, args = group[0], group[1], group[2:]
+        if kind == 'merged':
+            union = []
+            for keys, _, _ in waiters:
+                union.extend(keys)
+            args = (list(dict.fromkeys(union)),) + args
+        self.sent += 1
+        try:
+            result = self._invoke(method, args,
+                                  [context for _, _, context in waiters])
+        except Exception as exc:  # pylint: disable=broad-except
+            if kind == 'merged' and len(waiters) > 1:
+                LOGGER.debug("merged %s failed, sent again for each of %i "
+                             "callers", method, len(waiters))
+                for waiter in waiters:
+                    self._send(group, [waiter])
+                return
+            for _, future, _ in waiters:
+                future.set_exception(exc)
+            return
+        LOGGER.debug("%s sent once for %i callers", method, len(waiters))
+        for pos, (keys, future, _) in enumerate(waiters):
+            part = result if keys is None else \
+                MERGED[method](result, set(keys))
+            future.set_result(part if pos == 0 else copy.deepcopy(part))
+
+    def _invoke(self, method, args, contexts):
+        deadline, priority, timeout = _tightest(contexts)
+        with contextlib.ExitStack() as stack:
+            if deadline is not None:
+                stack.enter_context(self.client.deadline(deadline))
+            if priority is not None or timeout is not None:
+                stack.enter_context(self.client.call_options(priority, timeout))
+            return getattr(self.client, method)(*args)
+
+    def stop(self):
+        """stop once the pending requests are sent"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,97 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.dispatcher
+~~~~~~~
+
+Single I/O thread serving a priority queue of jobs
+"""
+
+import itertools
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import XTBApi.exceptions
+
+LOGGER = logging.getLogger('XTBApi.dispatcher')
+
+HIGH_PRIORITY = 0
+NORMAL_PRIORITY = 10
+LOW_PRIORITY = 20
+# commands served before the queued reads
+COMMAND_PRIORITIES = {
+    'login': HIGH_PRIORITY,
+    'tradeTransaction': HIGH_PRIORITY,
+    'tradeTransactionStatus': HIGH_PRIORITY,
+    'ping': HIGH_PRIORITY,
+}
+_STOP = float('inf')
+
+
+class Dispatcher(object):
+    """run jobs one at a time on a dedicated thread
+    lower priorities run first, equal priorities in submission order"""
+    def __init__(self, name='XTBApi-io'):
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=name,
+                                        daemon=True)
+        self._thread.start()
+
+    def in_io_thread(self):
+        return threading.current_thread() is self._thread
+
+    def submit(self, job, priority=NORMAL_PRIORITY):
+        """queue job, return a Future of its result
+        raises IOThreadStopped once stop() was called"""
+        future = Future()
+        with self._lock:
+            if self._stopped:
+                raise XTBApi.exceptions.IOThreadStopped()
+            self._queue.put((priority, next(self._counter), future, job))
+        return future
+
+    def call(self, job, priority=NORMAL_PRIORITY, timeout=None,
+             on_overrun=None):
+        """run job on the I/O thread and wait at most timeout seconds
+        a job still queued at the timeout is cancelled, after a job still
+        running on_overrun is run first on the I/O thread"""
+        if self.in_io_thread():
+            return job()
+        future = self.submit(job, priority)
+        try:
+            return future.result(timeout)
+        except FutureTimeout as exc:
+            if not future.cancel() and on_overrun is not None:
+                try:
+                    self.submit(on_overrun, HIGH_PRIORITY - 1)
+                except XTBApi.exceptions.IOThreadStopped:
+                    LOGGER.debug("stopped before the overrun")
+            raise XTBApi.exceptions.RequestTimeout(timeout) from exc
+
+    def _run(self):
+        while True:
+            priority, _, future, job = self._queue.get()
+            if priority == _STOP:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(job())
+            except BaseException as exc:  # pylint: disable=broad-except
+                future.set_exception(exc)
+        LOGGER.debug("%s stopped", self._thread.name)
+
+    def stop(self, wait=True):
+        """stop after the queued jobs, later submits raise"""
+        with self._lock:
+            if not self._stopped:
+                self._stopped = True
+                self._queue.put((_STOP, next(self._counter), None, None))
+        if wait and not self.in_io_thread():
+            self._thread.join()
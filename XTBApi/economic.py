@@ -0,0 +1,155 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.economic
+~~~~~~~
+
+Indexed economic calendar built from getCalendar
+"""
+
+import bisect
+import logging
+import time
+
+LOGGER = logging.getLogger('XTBApi.economic')
+
+LOW_IMPACT = 1
+MEDIUM_IMPACT = 2
+HIGH_IMPACT = 3
+
+# countries of the events moving a currency
+CURRENCY_COUNTRIES = {
+    'USD': ('US',),
+    'EUR': ('EMU', 'EU', 'DE', 'FR', 'IT', 'ES'),
+    'GBP': ('UK', 'GB'),
+    'JPY': ('JP',),
+    'CHF': ('CH',),
+    'CAD': ('CA',),
+    'AUD': ('AU',),
+    'NZD': ('NZ',),
+    'PLN': ('PL',),
+    'CZK': ('CZ',),
+    'HUF': ('HU',),
+    'SEK': ('SE',),
+    'NOK': ('NO',),
+    'CNH': ('CN',),
+}
+
+
+_EUR = CURRENCY_COUNTRIES['EUR']
+# countries of the events moving the usual indices and commodities
+SYMBOL_COUNTRIES = {
+    'US500': ('US',), 'US100': ('US',), 'US30': ('US',), 'US2000': ('US',),
+    'VIX': ('US',), 'DE30': _EUR, 'DE40': _EUR, 'EU50': _EUR,
+    'FRA40': _EUR, 'SPA35': _EUR, 'ITA40': _EUR, 'NED25': ('NL',) + _EUR,
+    'UK100': ('UK', 'GB'), 'SUI20': ('CH',), 'JP225': ('JP',),
+    'AUS200': ('AU',), 'HK50': ('HK', 'CN'), 'CH50CASH': ('CN',),
+    'W20': ('PL',), 'CZKCASH': ('CZ',),
+    'GOLD': ('US',), 'SILVER': ('US',), 'PLATINUM': ('US',),
+    'PALLADIUM': ('US',), 'COPPER': ('US', 'CN'), 'OIL': ('US',),
+    'OIL.WTI': ('US',), 'NATGAS': ('US',), 'GASOLINE': ('US',),
+    'CORN': ('US',), 'WHEAT': ('US',), 'SOYBEAN': ('US',),
+    'SUGAR': ('US',), 'COFFEE': ('US',), 'COCOA': ('US',),
+    'COTTON': ('US',),
+}
+
+
+def symbol_countries(symbol):
+    """countries whose events affect symbol, None for all of them
+    EURUSD -> currencies of the pair, AAPL.US_9 -> market suffix, indices
+    and commodities from SYMBOL_COUNTRIES. symbols not recognised match
+    every country so that news filters never skip them"""
+    name = symbol.split('_')[0]
+    if name.upper() in SYMBOL_COUNTRIES:
+        return SYMBOL_COUNTRIES[name.upper()]
+    if '.' in name:
+        return (name.rsplit('.', 1)[1],)
+    countries = ()
+    for currency in (name[:3], name[3:6]):
+        countries += CURRENCY_COUNTRIES.get(currency, ())
+    return countries or None
+
+
+def _key(event):
+    return (event['country'], event['title'], event['period'], event['time'])
+
+
+class EconomicCalendar(object):
+    """cached calendar indexed by time, country and impact
+    times are in seconds, call refresh() to download it again"""
+    def __init__(self, client, countries_of=symbol_countries):
+        self.client = client
+        self.countries_of = countries_of
+        self.last_refresh = None
+        self._events = {}
+        self._times = []
+        self._sorted = []
+        self._by_country = {}
+
+    def refresh(self):
+        """download the calendar and rebuild the index
+        returns the events new or changed since the last refresh"""
+        changed = []
+        events = {}
+        for record in self.client.get_calendar():
+            event = dict(record, time=record['time'] / 1000,
+                         impact=int(record['impact']))
+            key = _key(event)
+            events[key] = event
+            old = self._events.get(key)
+            if self.last_refresh is not None and old != event:
+                changed.append(event)
+        self._events = events
+        self._index()
+        self.last_refresh = time.time()
+        LOGGER.debug("calendar of %i events, %i changed", len(events),
+                     len(changed))
+        return changed
+
+    def _index(self):
+        self._sorted = sorted(self._events.values(), key=lambda ev: ev['time'])
+        self._times = [event['time'] for event in self._sorted]
+        self._by_country = {}
+        for event in self._sorted:
+            by_country = self._by_country.setdefault(event['country'], ([], []))
+            by_country[0].append(event['time'])
+            by_country[1].append(event)
+
+    def is_stale(self, max_age):
+        return self.last_refresh is None or \
+            time.time() - self.last_refresh > max_age
+
+    def events_between(self, start, end, countries=None, min_impact=LOW_IMPACT):
+        """events with start <= time <= end, oldest first"""
+        if countries is None:
+            sources = [(self._times, self._sorted)]
+        else:
+            sources = [self._by_country[country] for country in countries
+                       if country in self._by_country]
+        found = []
+        for times, events in sources:
+            low = bisect.bisect_left(times, start)
+            high = bisect.bisect_right(times, end)
+            found.extend(event for event in events[low:high]
+                         if event['impact'] >= min_impact)
+        if len(sources) > 1:
+            found.sort(key=lambda ev: ev['time'])
+        return found
+
+    def upcoming(self, minutes, symbol=None, min_impact=LOW_IMPACT, now=None):
+        """events in the next minutes, only those affecting symbol if given"""
+        now = time.time() if now is None else now
+        countries = self.countries_of(symbol) if symbol is not None else None
+        return self.events_between(now, now + minutes * 60, countries,
+                                   min_impact)
+
+    def has_event_near(self, symbol, minutes_before=30, minutes_after=30,
+                       min_impact=HIGH_IMPACT, now=None):
+        """True if an event affecting symbol is close to now"""
+        now = time.time() if now is None else now
+        return bool(self.events_between(
+            now - minutes_after * 60, now + minutes_before * 60,
+            self.countries_of(symbol), min_impact))
+
+    def __len__(self):
+        return len(self._sorted)
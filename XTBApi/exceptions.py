@@ -45,3 +45,39 @@ class TransactionRejected(Exception):
             status_code)
         LOGGER.error(self.msg)
         super().__init__(self.msg)
+
+
+class ReplayMismatch(Exception):
+    """when a replayed session receives a frame it did not record"""
+    def __init__(self, frame, expected):
+        self.frame = frame
+        self.expected = expected
+        self.msg = "frame {} does not match the recorded {}".format(
+            frame, expected)
+        LOGGER.error(self.msg)
+        super().__init__(self.msg)
+
+
+class IOThreadStopped(Exception):
+    """when a command is sent to an I/O thread already stopped"""
+    def __init__(self):
+        self.msg = "I/O thread stopped, command not sent"
+        LOGGER.error(self.msg)
+        super().__init__(self.msg)
+
+
+class RequestTimeout(Exception):
+    """when a request is not answered in time"""
+    def __init__(self, timeout, msg=None):
+        self.timeout = timeout
+        self.msg = msg or "request not completed in {} s.".format(timeout)
+        LOGGER.error(self.msg)
+        super().__init__(self.msg)
+
+
+class DeadlineExceeded(RequestTimeout):
+    """when the deadline of a call passes before its requests complete"""
+    def __init__(self, command=None):
+        self.command = command
+        super().__init__(0, "deadline exceeded before {} completed".format(
+            command or "the request"))
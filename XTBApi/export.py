@@ -0,0 +1,223 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.export
+~~~~~~~
+
+Incremental export of the trades history
+"""
+
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+LOGGER = logging.getLogger('XTBApi.export')
+DEFAULT_WINDOW = 30 * 24 * 3600
+BATCH_SIZE = 1000
+FIELDS = ('order', 'order2', 'position', 'symbol', 'cmd', 'volume',
+          'open_price', 'open_time', 'close_price', 'close_time', 'sl', 'tp',
+          'profit', 'commission', 'storage', 'margin_rate', 'digits',
+          'comment', 'customComment', 'expiration', 'offset', 'closed',
+          'timestamp')
+FIELD_TYPES = dict(
+    {name: float for name in FIELDS},
+    order=int, order2=int, position=int, cmd=int, digits=int, open_time=int,
+    close_time=int, expiration=int, offset=int, timestamp=int, symbol=str,
+    comment=str, customComment=str, closed=bool)
+
+
+def iter_trades_history(client, start, end=None, window=DEFAULT_WINDOW):
+    """yield the trades closed between start and end, oldest first
+    start and end are timestamps in seconds, the interval is requested
+    window seconds at a time so only one window is held in memory"""
+    end = time.time() if end is None else end
+    win_start = start
+    while win_start < end:
+        win_end = min(win_start + window, end)
+        low, high = int(win_start * 1000), int(win_end * 1000)
+        records = client.get_trades_history(low, high)
+        # windows share their bounds, keep each record in one window only
+        records = [rec for rec in records if low <= rec['close_time'] < high]
+        records.sort(key=lambda rec: (rec['close_time'], rec['order']))
+        LOGGER.debug("%i trades closed from %s to %s", len(records), low, high)
+        yield from records
+        win_start = win_end
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _sync(file):
+    """push the written data to the disk before the checkpoint moves on"""
+    file.flush()
+    os.fsync(file.fileno())
+
+
+class Checkpoint(object):
+    """(close time in milliseconds, order) of the last exported trade per
+    key, kept in a json file"""
+    def __init__(self, filename):
+        self.filename = filename
+        self._lock = threading.Lock()
+        try:
+            with open(filename) as file:
+                self._data = json.load(file)
+        except FileNotFoundError:
+            self._data = {}
+
+    def get(self, key):
+        with self._lock:
+            position = self._data.get(key)
+        if position is None:
+            return None
+        if not isinstance(position, list):
+            # close time only, written by older versions
+            return (position, float('inf'))
+        return tuple(position)
+
+    def set(self, key, close_time, order):
+        with self._lock:
+            self._data[key] = [close_time, order]
+            tmp_name = self.filename + '.tmp'
+            with open(tmp_name, 'w') as file:
+                json.dump(self._data, file)
+                _sync(file)
+            os.replace(tmp_name, self.filename)
+
+
+class CSVWriter(object):
+    """append the trades to a csv file, FIELDS as columns"""
+    def __init__(self, filename):
+        new_file = not os.path.exists(filename) or not os.path.getsize(filename)
+        self._file = open(filename, 'a', newline='')
+        self._writer = csv.DictWriter(self._file, FIELDS, extrasaction='ignore')
+        if new_file:
+            self._writer.writeheader()
+
+    def write_batch(self, records):
+        self._writer.writerows(records)
+        _sync(self._file)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class JSONLinesWriter(object):
+    """append the trades to a file as one json object per line"""
+    def __init__(self, filename):
+        self._file = open(filename, 'a')
+
+    def write_batch(self, records):
+        self._file.writelines(json.dumps(rec) + '\n' for rec in records)
+        _sync(self._file)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ParquetWriter(object):
+    """write the trades as parquet files in directory
+    one complete file per batch, named after its first trade, so a killed
+    run leaves only readable files and incremental runs add files next to
+    the previous ones. read them back with pyarrow.parquet.read_table(
+    directory). needs pyarrow"""
+    def __init__(self, directory):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as exc:
+            raise ImportError("ParquetWriter needs pyarrow, install "
+                              "XTBApi[parquet]") from exc
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        types = {int: pyarrow.int64(), float: pyarrow.float64(),
+                 str: pyarrow.string(), bool: pyarrow.bool_()}
+        self.schema = pyarrow.schema(
+            [(name, types[FIELD_TYPES[name]]) for name in FIELDS])
+        self.directory = directory
+        self.filenames = []
+
+    def write_batch(self, records):
+        columns = {name: [rec.get(name) for rec in records] for name in FIELDS}
+        table = self._pa.table(columns, schema=self.schema)
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"trades_{records[0]['close_time']}_{records[0]['order']}.parquet"
+        filename = os.path.join(self.directory, name)
+        # hidden until complete, read_table(directory) skips dot files
+        tmp_name = os.path.join(self.directory, '.' + name)
+        self._pq.write_table(table, tmp_name)
+        with open(tmp_name, 'rb') as file:
+            os.fsync(file.fileno())
+        os.replace(tmp_name, filename)
+        self.filenames.append(filename)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_trades_history(client, writer, start, end=None, checkpoint=None,
+                          key='default', window=DEFAULT_WINDOW,
+                          batch_size=BATCH_SIZE):
+    """write the trades history of client through writer
+    with a checkpoint the export restarts after the last trade exported
+    under key, trades closed at the same time are told apart by their
+    order. returns the number of trades written"""
+    last = checkpoint.get(key) if checkpoint is not None else None
+    if last is not None:
+        start = max(start, last[0] / 1000)
+    records = iter_trades_history(client, start, end, window)
+    if last is not None:
+        records = (rec for rec in records
+                   if (rec['close_time'], rec['order']) > last)
+    count = 0
+    for batch in _batches(records, batch_size):
+        writer.write_batch(batch)
+        count += len(batch)
+        if checkpoint is not None:
+            checkpoint.set(key, batch[-1]['close_time'], batch[-1]['order'])
+    LOGGER.info("exported %i trades of %s", count, key)
+    return count
+
+
+def export_accounts(clients, writer_factory, start, end=None, checkpoint=None,
+                    max_workers=4, **kwargs):
+    """export the history of many accounts in parallel
+    clients maps an account key to its logged client, writer_factory(key)
+    returns the writer of that account. returns the trades written per key"""
+    def _export(key):
+        with writer_factory(key) as writer:
+            return export_trades_history(clients[key], writer, start, end,
+                                         checkpoint, key, **kwargs)
+    with ThreadPoolExecutor(max_workers) as executor:
+        counts = executor.map(_export, list(clients))
+        return dict(zip(list(clients), counts))
@@ -0,0 +1,21 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.modes
+~~~~~~~
+
+Trade modes of the API, shared by the client and the sizing helpers
+"""
+
+import enum
+
+
+class MODES(enum.Enum):
+    BUY = 0
+    SELL = 1
+    BUY_LIMIT = 2
+    SELL_LIMIT = 3
+    BUY_STOP = 4
+    SELL_STOP = 5
+    BALANCE = 6
+    CREDIT = 7
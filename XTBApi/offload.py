@@ -0,0 +1,209 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.offload
+~~~~~~~
+
+Decode and convert large responses in a worker pool
+"""
+
+import json
+import logging
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import XTBApi.exceptions
+from XTBApi.api import chart_range_info, get_data
+
+LOGGER = logging.getLogger('XTBApi.offload')
+DEFAULT_THRESHOLD = 256 * 1024
+
+SYMBOL_NUMBERS = ('ask', 'bid', 'high', 'low', 'lotMin', 'lotMax', 'lotStep',
+                  'precision', 'contractSize', 'leverage', 'spreadRaw', 'time')
+SYMBOL_STRINGS = ('symbol', 'currency', 'categoryName', 'groupName',
+                  'description')
+CANDLE_NUMBERS = ('timestamp', 'open', 'close', 'high', 'low', 'volume')
+TRADE_NUMBERS = ('order', 'position', 'cmd', 'volume', 'open_price',
+                 'close_price', 'open_time', 'close_time', 'sl', 'tp',
+                 'profit', 'commission', 'storage')
+TRADE_STRINGS = ('symbol', 'comment', 'customComment')
+
+
+def _records_columns(records, numbers, strings):
+    numeric = {name: array('d', (rec.get(name) or 0.0 for rec in records))
+               for name in numbers}
+    text = {name: [rec.get(name) for rec in records] for name in strings}
+    return numeric, text
+
+
+def symbols_columns(data):
+    """getAllSymbols records to columns"""
+    return _records_columns(data, SYMBOL_NUMBERS, SYMBOL_STRINGS)
+
+
+def trades_columns(data):
+    """getTradesHistory or getTrades records to columns"""
+    return _records_columns(data, TRADE_NUMBERS, TRADE_STRINGS)
+
+
+def candles_columns(data):
+    """getChartRangeRequest/getChartLastRequest data to prices columns"""
+    scale = 10 ** data['digits']
+    numeric = {name: array('d') for name in CANDLE_NUMBERS}
+    for candle in data['rateInfos']:
+        _pr = candle['open']
+        numeric['timestamp'].append(candle['ctm'] / 1000)
+        numeric['open'].append(_pr / scale)
+        numeric['close'].append((_pr + candle['close']) / scale)
+        numeric['high'].append((_pr + candle['high']) / scale)
+        numeric['low'].append((_pr + candle['low']) / scale)
+        numeric['volume'].append(candle['vol'])
+    return numeric, {}
+
+
+def _to_shared_memory(numeric):
+    """copy the numeric columns in one shared memory block"""
+    from multiprocessing import resource_tracker, shared_memory
+    names = list(numeric)
+    length = len(numeric[names[0]]) if names else 0
+    size = max(1, len(names) * length * 8)
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    # the parent process attaches and unlinks the block
+    resource_tracker.unregister(shm._name, 'shared_memory')  # pylint: disable=protected-access
+    for pos, name in enumerate(names):
+        start = pos * length * 8
+        shm.buf[start:start + length * 8] = numeric[name].tobytes()
+    shm.close()
+    return shm.name, names, length
+
+
+def _decode(response, converter, shared):
+    """runs in the worker: decode the frame then convert its returnData"""
+    res = json.loads(response)
+    if res['status'] is False:
+        return 'failed', res
+    numeric, text = converter(res['returnData'])
+    if shared:
+        return 'shared', (_to_shared_memory(numeric), text)
+    return 'columns', (numeric, text)
+
+
+class ColumnTable(object):
+    """converted response, numeric columns as arrays of doubles
+
+    columns decoded in a process pool are views on a shared memory block,
+    call close() once the table is not needed anymore"""
+    def __init__(self, numeric, text, shm=None):
+        self.columns = dict(numeric, **text)
+        self._shm = shm
+
+    @classmethod
+    def from_shared_memory(cls, name, names, length, text):
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(name=name)
+        view = shm.buf.cast('d')
+        numeric = {col: view[pos * length:(pos + 1) * length]
+                   for pos, col in enumerate(names)}
+        return cls(numeric, text, shm)
+
+    def column(self, name):
+        return self.columns[name]
+
+    def __len__(self):
+        for values in self.columns.values():
+            return len(values)
+        return 0
+
+    def close(self):
+        """release the shared memory if any"""
+        if self._shm is None:
+            return
+        for values in self.columns.values():
+            if isinstance(values, memoryview):
+                values.release()
+        self.columns = {}
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class OffloadPool(object):
+    """decode large responses out of the thread owning the websocket
+
+    the request is sent and received on the calling thread, then frames
+    longer than threshold characters are decoded and converted to a
+    ColumnTable by a process pool (kind='process', results come back
+    through shared memory) or a thread pool (kind='thread'). smaller
+    frames are converted inline. every method returns a Future."""
+    def __init__(self, kind='process', max_workers=None,
+                 threshold=DEFAULT_THRESHOLD):
+        if kind not in ('process', 'thread'):
+            raise ValueError("kind must be 'process' or 'thread'")
+        self.kind = kind
+        self.threshold = threshold
+        executor_cls = ProcessPoolExecutor if kind == 'process' else \
+            ThreadPoolExecutor
+        self.executor = executor_cls(max_workers)
+
+    def request(self, client, dict_data, converter):
+        """send dict_data with client, convert the answer with converter
+        converter must be a module level function for process pools"""
+        response = client._send_command_raw_with_check(dict_data)  # pylint: disable=protected-access
+        if len(response) < self.threshold:
+            future = Future()
+            try:
+                future.set_result(_unpack(_decode(response, converter, False)))
+            except XTBApi.exceptions.CommandFailed as exc:
+                future.set_exception(exc)
+            return future
+        shared = self.kind == 'process'
+        inner = self.executor.submit(_decode, response, converter, shared)
+        future = Future()
+
+        def _done(done):
+            try:
+                future.set_result(_unpack(done.result()))
+            except Exception as exc:  # pylint: disable=broad-except
+                future.set_exception(exc)
+        inner.add_done_callback(_done)
+        LOGGER.debug("offloaded %s of %i chars", dict_data['command'],
+                     len(response))
+        return future
+
+    def all_symbols(self, client):
+        return self.request(client, get_data("getAllSymbols"),
+                            symbols_columns)
+
+    def chart_range(self, client, symbol, period, start, end, ticks=0):
+        args = chart_range_info(symbol, period, start, end, ticks)
+        return self.request(client, get_data("getChartRangeRequest",
+                                             info=args), candles_columns)
+
+    def trades_history(self, client, start, end):
+        return self.request(client, get_data(
+            "getTradesHistory", end=end, start=start), trades_columns)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+def _unpack(result):
+    kind, payload = result
+    if kind == 'failed':
+        raise XTBApi.exceptions.CommandFailed(payload)
+    if kind == 'shared':
+        (name, names, length), text = payload
+        return ColumnTable.from_shared_memory(name, names, length, text)
+    return ColumnTable(*payload)
@@ -0,0 +1,79 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.quotes
+~~~~~~~
+
+Columnar quote table built from getTickPrices
+"""
+
+from array import array
+
+COLUMNS = ('bid', 'ask', 'bidVolume', 'askVolume', 'high', 'low',
+           'spreadRaw', 'timestamp')
+
+
+class QuoteTable(object):
+    """snapshot of quotes, one row per symbol and one array per column
+    timestamps are in seconds"""
+    def __init__(self):
+        self.symbols = []
+        self.index = {}
+        self.columns = {name: array('d') for name in COLUMNS}
+
+    @classmethod
+    def from_quotations(cls, quotations):
+        """build from the quotations list of a getTickPrices response"""
+        table = cls()
+        table.add_quotations(quotations)
+        return table
+
+    def add_quotations(self, quotations):
+        """insert or overwrite rows, returns the symbols touched"""
+        changed = []
+        for quote in quotations:
+            values = dict(quote, timestamp=quote['timestamp'] / 1000)
+            changed.append(self._set_row(quote['symbol'], values))
+        return changed
+
+    def update(self, other):
+        """merge the rows of another table, returns the symbols touched"""
+        return [self._set_row(symbol, other.row(symbol)) for symbol in other]
+
+    def _set_row(self, symbol, values):
+        row = self.index.get(symbol)
+        if row is None:
+            row = self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            for name in COLUMNS:
+                self.columns[name].append(0.0)
+        for name in COLUMNS:
+            value = values.get(name)
+            self.columns[name][row] = value if value is not None else 0.0
+        return symbol
+
+    @property
+    def last_timestamp(self):
+        """most recent quote time in seconds, 0 if empty"""
+        return max(self.columns['timestamp'], default=0)
+
+    def column(self, name):
+        return self.columns[name]
+
+    def row(self, symbol):
+        row = self.index[symbol]
+        quote = {name: self.columns[name][row] for name in COLUMNS}
+        quote['symbol'] = symbol
+        return quote
+
+    def __getitem__(self, symbol):
+        return self.row(symbol)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __len__(self):
+        return len(self.symbols)
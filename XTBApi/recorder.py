@@ -0,0 +1,162 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.recorder
+~~~~~~~
+
+Record the frames exchanged with the server and replay them offline
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+
+import XTBApi.exceptions
+from XTBApi.api import Client
+
+LOGGER = logging.getLogger('XTBApi.recorder')
+REDACTED = '<redacted>'
+
+
+def _redact(frame):
+    """hide the password of login frames"""
+    if '"password"' not in frame:
+        return frame
+    data = json.loads(frame)
+    data.get('arguments', {})['password'] = REDACTED
+    return json.dumps(data)
+
+
+class SessionRecorder(object):
+    """append the exchanged frames to a gzip compressed json lines file
+
+    every line holds the monotonic time the request was sent relative to
+    the start of the recording, the round trip time and the frames.
+    the file is rotated like logging.handlers.RotatingFileHandler once
+    max_bytes of uncompressed data were written, 0 never rotates"""
+    def __init__(self, filename, max_bytes=50 * 2 ** 20, backup_count=5):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._written = 0
+        self._file = gzip.open(filename, 'at')
+
+    def record(self, frame, response, sent, received, kind='command'):
+        """log one exchange, times from time.monotonic()"""
+        line = json.dumps({'kind': kind, 't': sent - self._start,
+                           'rtt': received - sent, 'out': _redact(frame),
+                           'in': response}) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._written += len(line)
+            if self.max_bytes and self._written >= self.max_bytes:
+                self._rotate()
+
+    def record_stream(self, message):
+        """log a message pushed by the server"""
+        now = time.monotonic()
+        self.record(None, message, now, now, kind='stream')
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.filename}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.filename}.{index + 1}")
+        if self.backup_count:
+            os.replace(self.filename, f"{self.filename}.1")
+        else:
+            os.remove(self.filename)
+        self._file = gzip.open(self.filename, 'wt')
+        self._written = 0
+        LOGGER.debug("rotated %s", self.filename)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_session(filename):
+    """yield the recorded exchanges, rotated files first"""
+    backups = []
+    index = 1
+    while os.path.exists(f"{filename}.{index}"):
+        backups.append(f"{filename}.{index}")
+        index += 1
+    for name in reversed(backups):
+        yield from _read_file(name)
+    if os.path.exists(filename):
+        yield from _read_file(filename)
+
+
+def _read_file(name):
+    with gzip.open(name, 'rt') as file:
+        for line in file:
+            yield json.loads(line)
+
+
+class ReplaySocket(object):
+    """socket-like object answering with a recorded session
+
+    the outgoing frames are checked against the recorded ones, on the
+    command name or on the whole frame with strict. with realtime the
+    original pacing and round trip times are reproduced"""
+    def __init__(self, records, realtime=False, strict=False):
+        self._records = iter(rec for rec in records if rec['kind'] == 'command')
+        self.realtime = realtime
+        self.strict = strict
+        self.connected = True
+        self._response = None
+        self._clock = None
+
+    def send(self, frame):
+        record = next(self._records, None)
+        if record is None:
+            raise XTBApi.exceptions.ReplayMismatch(frame, None)
+        sent, expected = json.loads(_redact(frame)), json.loads(record['out'])
+        if sent['command'] != expected['command'] or \
+                self.strict and sent != expected:
+            raise XTBApi.exceptions.ReplayMismatch(frame, record['out'])
+        if self.realtime:
+            now = time.monotonic()
+            if self._clock is None:
+                self._clock = now - record['t']
+            time.sleep(max(0.0, self._clock + record['t'] - now))
+            time.sleep(record['rtt'])
+        self._response = record['in']
+
+    def recv(self):
+        response, self._response = self._response, None
+        return response
+
+    def close(self):
+        self.connected = False
+
+
+class ReplayClient(Client):
+    """Client playing back a recorded session without network"""
+    def __init__(self, filename, realtime=False, strict=False, cache=None):
+        super().__init__(cache)
+        self.filename = filename
+        self.realtime = realtime
+        self.strict = strict
+        self.max_time_interval = 0
+        self.logger = logging.getLogger('XTBApi.recorder.ReplayClient')
+
+    def _connect(self, mode, timeout=None):
+        return ReplaySocket(read_session(self.filename), self.realtime,
+                            self.strict)
+
+    def login(self, user_id='replay', password=REDACTED, mode='replay'):
+        return super().login(user_id, password, mode)
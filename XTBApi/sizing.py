@@ -0,0 +1,102 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.sizing
+~~~~~~~
+
+Volume and SL/TP sizing of batches of orders
+"""
+
+from decimal import Decimal
+
+from XTBApi.modes import MODES
+
+
+def step_digits(step):
+    """decimal digits of a lot step, 0.01 -> 2, 0.5 -> 1, 10 -> 0"""
+    return max(0, -Decimal(str(step)).normalize().as_tuple().exponent)
+
+
+def round_to_step(volume, lot_step):
+    """round volume to the nearest multiple of lot_step"""
+    if not lot_step:
+        return volume
+    return round(round(volume / lot_step) * lot_step, step_digits(lot_step))
+
+
+def _mode_value(side):
+    if isinstance(side, MODES):
+        return side.value
+    if isinstance(side, str):
+        return MODES[side.upper()].value
+    return MODES(side).value
+
+
+def _is_buy(mode):
+    return mode in (MODES.BUY.value, MODES.BUY_LIMIT.value, MODES.BUY_STOP.value)
+
+
+def _levels(mode, price, sl_per, tp_per, digits):
+    if _is_buy(mode):
+        sl, tp = price * (1 - sl_per), price * (1 + tp_per)
+    else:
+        sl, tp = price * (1 + sl_per), price * (1 - tp_per)
+    return (round(sl, digits) if sl_per else 0.0,
+            round(tp, digits) if tp_per else 0.0)
+
+
+def _or(values, default):
+    """values unless None, arrays have no truth value"""
+    return default if values is None else values
+
+
+def size_orders(specs, symbols, sides, prices=None, dollars=None,
+                volumes=None, sl_pers=None, tp_pers=None):
+    """size a batch of orders in one pass
+
+    specs maps each symbol to its getSymbol record (lotStep, lotMin,
+    lotMax, precision, contractSize, ask, bid). sides are 'buy'/'sell',
+    MODES or their values. every other argument is a sequence parallel to
+    symbols; prices default to ask for buys and bid for sells, volumes
+    are taken from dollars / (price * contractSize) when dollars are given.
+    volumes are rounded to the lot step and clamped to [lotMin, lotMax],
+    prices and SL/TP levels are rounded to the symbol precision, a 0
+    percentage gives a 0 level. returns columns as a dict of lists."""
+    if volumes is None and dollars is None:
+        raise ValueError("volumes or dollars required")
+    count = len(symbols)
+    given = {'sides': sides, 'prices': prices, 'dollars': dollars,
+             'volumes': volumes, 'sl_pers': sl_pers, 'tp_pers': tp_pers}
+    for name, values in given.items():
+        if values is not None and len(values) != count:
+            raise ValueError(f"{name} has {len(values)} items for {count} "
+                             f"symbols")
+    none = [None] * count
+    zeros = [0.0] * count
+    columns = {'symbol': [], 'mode': [], 'price': [], 'volume': [],
+               'sl': [], 'tp': []}
+    for symbol, side, price, amount, volume, sl_per, tp_per in zip(
+            symbols, sides, _or(prices, none), _or(dollars, none),
+            _or(volumes, none), _or(sl_pers, zeros), _or(tp_pers, zeros)):
+        spec = specs[symbol]
+        mode = _mode_value(side)
+        digits = spec.get('precision', 2)
+        if price is None:
+            price = spec['ask'] if _is_buy(mode) else spec['bid']
+        price = round(price, digits)
+        if amount is not None:
+            volume = amount / (price * spec.get('contractSize', 1))
+        if volume is None:
+            raise ValueError(f"no volume or dollars for {symbol}")
+        lot_step = spec.get('lotStep', 0)
+        volume = round_to_step(volume, lot_step)
+        volume = min(max(volume, spec.get('lotMin', volume)),
+                     spec.get('lotMax', volume))
+        sl, tp = _levels(mode, price, sl_per, tp_per, digits)
+        columns['symbol'].append(symbol)
+        columns['mode'].append(mode)
+        columns['price'].append(price)
+        columns['volume'].append(volume)
+        columns['sl'].append(sl)
+        columns['tp'].append(tp)
+    return columns
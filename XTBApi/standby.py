@@ -0,0 +1,116 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.standby
+~~~~~~~
+
+Second logged in session kept ready to replace a dropped one
+"""
+
+import json
+import logging
+import threading
+
+import XTBApi.exceptions
+
+LOGGER = logging.getLogger('XTBApi.standby')
+DEFAULT_PING_INTERVAL = 60
+RETRY_INTERVAL = 5
+
+
+class StandbySession(object):
+    """keep a spare socket logged in from a background thread
+
+    connect() opens a socket, login_data is the login command sent on it.
+    the session is kept alive with a ping every ping_interval seconds,
+    take() hands it over and a new one is built in the background"""
+    def __init__(self, connect, login_data, ping_interval=DEFAULT_PING_INTERVAL,
+                 timeout=None):
+        self.connect = connect
+        self.login_data = login_data
+        self.ping_interval = ping_interval
+        self.timeout = timeout
+        self.built = 0
+        self._ws = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='XTBApi-standby',
+                                        daemon=True)
+        self._thread.start()
+
+    @property
+    def ready(self):
+        return self._ws is not None
+
+    def _exchange(self, ws, dict_data):
+        if hasattr(ws, 'settimeout'):
+            ws.settimeout(self.timeout)
+        ws.send(json.dumps(dict_data))
+        response = json.loads(ws.recv())
+        if response['status'] is False:
+            raise XTBApi.exceptions.CommandFailed(response)
+
+    def _open(self):
+        ws = self.connect()
+        try:
+            self._exchange(ws, self.login_data)
+        except Exception:
+            _close(ws)
+            raise
+        return ws
+
+    def _keep_alive(self):
+        """ping the standby socket, open a new one if there is none
+        the socket is out of reach of take() while its ping runs, so a
+        stalled ping never delays a failover"""
+        with self._lock:
+            ws, self._ws = self._ws, None
+        if ws is not None:
+            try:
+                self._exchange(ws, {'command': 'ping'})
+            except Exception:
+                _close(ws)
+                raise
+        else:
+            ws = self._open()
+            self.built += 1
+            LOGGER.debug("standby session ready")
+        with self._lock:
+            if self._stopped.is_set():
+                _close(ws)
+                return
+            self._ws = ws
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self._keep_alive()
+                delay = self.ping_interval
+            except Exception as exc:  # pylint: disable=broad-except
+                LOGGER.warning("standby session failed: %s", exc)
+                delay = RETRY_INTERVAL
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+
+    def take(self):
+        """the standby socket or None if not ready or being pinged, a new
+        one is built"""
+        with self._lock:
+            ws, self._ws = self._ws, None
+        self._wakeup.set()
+        return ws
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        _close(self.take())
+
+
+def _close(ws):
+    if ws is None:
+        return
+    try:
+        ws.close()
+    except Exception as exc:  # pylint: disable=broad-except
+        LOGGER.debug("closing standby socket: %s", exc)
@@ -0,0 +1,148 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.symbols
+~~~~~~~
+
+Indexed catalog of the symbols returned by getAllSymbols
+"""
+
+import bisect
+import difflib
+import json
+import logging
+import os
+import time
+
+LOGGER = logging.getLogger('XTBApi.symbols')
+
+# suffixes of the variants selected by type_of_instrument in open_trade
+VARIANT_SUFFIXES = {'stc': '_9', 'cfd': '_4'}
+# filters of SymbolCatalog.select and the record field they check
+FLAG_FIELDS = {'long_only': 'longOnly', 'short_selling': 'shortSelling',
+               'trailing': 'trailingEnabled'}
+
+
+def base_ticker(symbol):
+    """AAPL.US_9 -> AAPL.US"""
+    for suffix in VARIANT_SUFFIXES.values():
+        if symbol.endswith(suffix):
+            return symbol[:-len(suffix)]
+    return symbol
+
+
+class SymbolCatalog(object):
+    """getAllSymbols records indexed by name, prefix, category, group,
+    currency and base ticker. lookups are case insensitive"""
+    def __init__(self, records, built=None):
+        self.records = list(records)
+        self.built = time.time() if built is None else built
+        self._by_symbol = {}
+        self._names = []
+        self._by_field = {'categoryName': {}, 'groupName': {}, 'currency': {}}
+        self._variants = {}
+        self._index()
+
+    def _index(self):
+        for record in self.records:
+            name = record['symbol'].upper()
+            self._by_symbol[name] = record
+            for field, index in self._by_field.items():
+                index.setdefault(record.get(field), set()).add(name)
+            base = base_ticker(name)
+            self._variants.setdefault(base, {})[
+                name[len(base):] or None] = record
+        self._names = sorted(self._by_symbol)
+
+    @classmethod
+    def from_client(cls, client):
+        return cls(client.get_all_symbols())
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename) as file:
+            data = json.load(file)
+        return cls(data['records'], data['built'])
+
+    @classmethod
+    def cached(cls, client, filename, max_age=24 * 3600):
+        """catalog saved in filename, downloaded again when older than
+        max_age seconds"""
+        if os.path.exists(filename):
+            catalog = cls.load(filename)
+            if time.time() - catalog.built <= max_age:
+                return catalog
+        catalog = cls.from_client(client)
+        catalog.save(filename)
+        LOGGER.debug("saved catalog of %i symbols in %s", len(catalog),
+                     filename)
+        return catalog
+
+    def save(self, filename):
+        """write the records to filename, atomically"""
+        temp = filename + '.tmp'
+        with open(temp, 'w') as file:
+            json.dump({'built': self.built, 'records': self.records}, file)
+        os.replace(temp, filename)
+
+    def get(self, symbol, default=None):
+        return self._by_symbol.get(symbol.upper(), default)
+
+    def prefix(self, text):
+        """records whose symbol starts with text, sorted by symbol"""
+        text = text.upper()
+        start = bisect.bisect_left(self._names, text)
+        end = bisect.bisect_left(self._names, text + '\uffff')
+        return [self._by_symbol[name] for name in self._names[start:end]]
+
+    def fuzzy(self, text, limit=5, cutoff=0.6):
+        """closest symbols to text, base tickers match all their variants"""
+        text = text.upper()
+        found = []
+        for name in difflib.get_close_matches(
+                text, list(self._variants), limit, cutoff):
+            found.extend(self._variants[name].values())
+        return found[:limit]
+
+    def select(self, category=None, group=None, currency=None, **flags):
+        """records matching every filter given, flags are long_only,
+        short_selling and trailing set to True or False"""
+        names = None
+        for field, value in (('categoryName', category),
+                             ('groupName', group), ('currency', currency)):
+            if value is None:
+                continue
+            found = self._by_field[field].get(value, set())
+            names = found if names is None else names & found
+        records = [self._by_symbol[name] for name in
+                   (self._names if names is None else sorted(names))]
+        for flag, value in flags.items():
+            field = FLAG_FIELDS[flag]
+            records = [rec for rec in records if bool(rec.get(field)) is value]
+        return records
+
+    def variants(self, ticker):
+        """{'stc': record, 'cfd': record} of the variants of ticker found"""
+        found = self._variants.get(base_ticker(ticker.upper()), {})
+        return {kind: found[suffix.upper()] for kind, suffix in
+                VARIANT_SUFFIXES.items() if suffix.upper() in found}
+
+    def resolve(self, ticker, type_of_instrument=""):
+        """symbol to trade for ticker, like open_trade's type_of_instrument
+        without a type the ticker itself, else its only variant"""
+        if type_of_instrument:
+            record = self.variants(ticker).get(type_of_instrument)
+        else:
+            record = self.get(ticker)
+            if record is None:
+                variants = list(self.variants(ticker).values())
+                record = variants[0] if len(variants) == 1 else None
+        if record is None:
+            raise KeyError(ticker)
+        return record['symbol']
+
+    def __contains__(self, symbol):
+        return symbol.upper() in self._by_symbol
+
+    def __len__(self):
+        return len(self.records)
@@ -0,0 +1,25 @@
+"""
+tests.conftest.py
+~~~~~~~
+
+offline fixtures, a fake websocket answering commands locally
+"""
+
+import logging
+
+import pytest
+
+import XTBApi.api
+from XTBApi.tests.fake import offline_client as _offline_client
+
+
+@pytest.fixture
+def offline_client(monkeypatch):
+    """build a logged client of cls talking to a FakeSocket"""
+    monkeypatch.setattr(XTBApi.api, 'MAX_TIME_INTERVAL', 0)
+    # the live test modules set the level of XTBApi.api when collected
+    api_logger = logging.getLogger('XTBApi.api')
+    level = api_logger.level
+    api_logger.setLevel(logging.NOTSET)
+    yield _offline_client
+    api_logger.setLevel(level)
@@ -0,0 +1,49 @@
+"""
+tests.fake.py
+~~~~~~~
+
+a fake websocket answering commands locally, shared by the offline tests
+and the benchmarks
+"""
+
+import json
+
+import XTBApi.api
+
+
+class FakeSocket(object):
+    """stand-in for the websocket, answers with responder(request)"""
+    def __init__(self, responder):
+        self.responder = responder
+        self.sent = []
+        self._pending = []
+        self.connected = True
+
+    def send(self, frame):
+        request = json.loads(frame)
+        self.sent.append(request)
+        response = self.responder(request)
+        if not isinstance(response, str):  # frames can be pre-encoded
+            response = json.dumps(response)
+        self._pending.append(response)
+
+    def recv(self):
+        return self._pending.pop(0)
+
+    def close(self):
+        self.connected = False
+
+
+def answer(return_data):
+    """successful response envelope"""
+    return {'status': True, 'returnData': return_data}
+
+
+def offline_client(responder, cls=XTBApi.api.Client):
+    """logged client of cls without throttling talking to a FakeSocket"""
+    client = cls()
+    client.max_time_interval = 0
+    client.ws = FakeSocket(responder)
+    client.status = XTBApi.api.STATUS.LOGGED
+    client._login_data = ('user', 'password', 'demo')
+    return client
@@ -0,0 +1,83 @@
+"""
+tests.test_backtest.py
+~~~~~~~
+
+test the simulated broker
+"""
+
+import pytest
+
+from XTBApi.backtest import Broker, PaperClient
+from XTBApi.exceptions import CommandFailed
+
+DAY = 24 * 3600
+
+
+def _candles(closes, start=DAY):
+    return [{'timestamp': start + x * 60, 'open': close, 'high': close + 1,
+             'low': close - 1, 'close': close, 'volume': 10}
+            for x, close in enumerate(closes)]
+
+
+@pytest.fixture
+def _client():
+    broker = Broker({'ABC.US_9': {'lotStep': 1.0, 'lotMin': 1.0,
+                                  'spreadRaw': 0.1},
+                     'XYZ': {'shortSelling': False}})
+    broker.load_candles('ABC.US_9', _candles([100, 101, 103, 110, 90]))
+    broker.load_candles('XYZ', _candles([10, 11, 12, 13, 14]))
+    client = PaperClient(broker)
+    client.login()
+    return client
+
+
+def test_open_with_dollars_rounds_to_lot_step(_client):
+    replay = _client.broker.replay()
+    next(replay)
+    next(replay)
+    _client.open_trade('buy', 'ABC.US', dollars=1000,
+                       type_of_instrument='stc')
+    trades = _client.update_trades()
+    assert len(trades) == 1
+    trade = list(trades.values())[0]
+    assert trade.volume == 10.0
+    assert _client.broker.positions[trade.order_id]['open_price'] == 100.1
+
+
+def test_take_profit_is_triggered(_client):
+    broker = _client.broker
+    replay = broker.replay()
+    next(replay)
+    next(replay)
+    _client.open_trade('buy', 'ABC.US_9', volume=2, tp_per=0.05, sl_per=0.2)
+    for _ in replay:
+        pass
+    assert not _client.update_trades()
+    closed = broker.history[0]
+    assert closed['tp'] == 105.11
+    # the market gapped above the take profit, filled at the open
+    assert closed['close_price'] == 110
+    assert closed['profit'] == pytest.approx(19.8)
+    assert _client.get_margin_level()['balance'] == pytest.approx(10019.8)
+
+
+def test_close_trade_and_reject(_client):
+    replay = _client.broker.replay()
+    for _ in range(4):
+        next(replay)
+    response = _client.open_trade('sell', 'XYZ', volume=1)
+    status = _client.trade_transaction_status(response['order'])
+    assert status['message'] == 'Short selling not available'
+    _client.open_trade('buy', 'XYZ', volume=1)
+    order_id = list(_client.update_trades())[0]
+    _client.close_trade(order_id)
+    assert not _client.update_trades()
+    with pytest.raises(CommandFailed):
+        _client.trade_transaction('XYZ', 0, 2, 1.0, order=order_id)
+
+
+def test_candle_history(_client):
+    for _ in _client.broker.replay():
+        pass
+    candles = _client.get_lastn_candle_history('XYZ', 60, 3)
+    assert [candle['close'] for candle in candles] == [12, 13, 14]
@@ -0,0 +1,124 @@
+"""
+tests.test_cache.py
+~~~~~~~
+
+test the response cache
+"""
+
+import threading
+import time
+
+import pytest
+
+from XTBApi.api import Client
+from XTBApi.cache import FOREVER, ResponseCache, ShelveBackend, closed_range_ttl
+from XTBApi.exceptions import DeadlineExceeded
+from XTBApi.tests.fake import answer
+
+TRADING_HOURS = [{'symbol': 'EURUSD',
+                  'trading': [{'day': 1, 'fromT': 3600000, 'toT': 7200000}],
+                  'quotes': [{'day': 1, 'fromT': 3600000, 'toT': 7200000}]}]
+
+
+def _responder(request):
+    if request['command'] == 'getTradingHours':
+        return answer(TRADING_HOURS)
+    return answer({'version': '2.5.0'})
+
+
+def test_read_commands_are_cached(offline_client):
+    client = offline_client(_responder, Client)
+    client.cache = ResponseCache()
+    assert client.get_version() == client.get_version()
+    assert [r['command'] for r in client.ws.sent] == ['getVersion']
+    assert client.cache.stats()['getVersion']['hit_rate'] == 0.5
+
+
+def test_cached_responses_are_copies(offline_client):
+    client = offline_client(_responder, Client)
+    client.cache = ResponseCache()
+    first = client.get_trading_hours(['EURUSD'])
+    second = client.get_trading_hours(['EURUSD'])
+    assert first == second
+    assert second[0]['trading'][0]['fromT'] == 3600
+
+
+def test_uncached_commands_and_expiry(offline_client):
+    client = offline_client(_responder, Client)
+    client.cache = ResponseCache(policies={'getVersion': 0.05})
+    client.get_margin_level()
+    client.get_margin_level()
+    client.get_version()
+    time.sleep(0.06)
+    client.get_version()
+    assert len(client.ws.sent) == 4
+
+
+def test_lru_eviction():
+    cache = ResponseCache(policies={'getSymbol': 60}, maxsize=2)
+    for symbol in ['A', 'B', 'A', 'C', 'A']:
+        request = {'command': 'getSymbol', 'arguments': {'symbol': symbol}}
+        cache.fetch(request, lambda: {'symbol': symbol})
+    assert cache.evictions == 1
+    assert cache.stats()['getSymbol']['hits'] == 2
+
+
+def test_coalescing():
+    cache = ResponseCache(policies={'getCalendar': 60})
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        release.wait(1)
+        return [{'country': 'US'}]
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        cache.fetch({'command': 'getCalendar'}, call))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [[{'country': 'US'}]] * 5
+
+
+def test_closed_chart_range_is_persisted(tmp_path):
+    filename = str(tmp_path / 'charts')
+    end = (time.time() - 86400) * 1000
+    request = {'command': 'getChartRangeRequest', 'arguments': {'info': {
+        'end': end, 'period': 1440, 'start': end - 86400000,
+        'symbol': 'EURUSD', 'ticks': 0}}}
+    backend = ShelveBackend(filename)
+    ResponseCache(backend=backend).fetch(request, lambda: {'digits': 5})
+    backend.close()
+    cache = ResponseCache(backend=ShelveBackend(filename))
+    assert cache.fetch(request, lambda: 1 / 0) == {'digits': 5}
+    cache.backend.close()
+
+
+def test_chart_range_with_ticks_reaching_now():
+    start = (time.time() - 3 * 86400) * 1000
+    info = {'end': start + 86400000, 'period': 1440, 'start': start,
+            'symbol': 'EURUSD', 'ticks': 10}
+    assert closed_range_ttl({'info': info}) == 0
+    assert closed_range_ttl({'info': dict(info, ticks=2)}) == FOREVER
+    assert closed_range_ttl({'info': dict(info, ticks=-10)}) == FOREVER
+
+
+def test_coalesced_wait_ends_at_deadline():
+    cache = ResponseCache(policies={'getCalendar': 60})
+    release = threading.Event()
+    owner = threading.Thread(target=lambda: cache.fetch(
+        {'command': 'getCalendar'}, lambda: release.wait(1) and []))
+    owner.start()
+    time.sleep(0.02)
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        cache.fetch({'command': 'getCalendar'}, lambda: 1 / 0,
+                    deadline=start + 0.05)
+    assert time.monotonic() - start < 0.5
+    release.set()
+    owner.join()
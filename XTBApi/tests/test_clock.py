@@ -0,0 +1,89 @@
+"""
+tests.test_clock.py
+~~~~~~~
+
+test the server clock synchronization
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from XTBApi.api import Client
+from XTBApi.tests.fake import answer
+
+SKEW = 3600.0
+
+
+def _responder(request):
+    if request['command'] == 'getServerTime':
+        return answer({'time': int((time.time() + SKEW) * 1000),
+                       'timeString': ''})
+    if request['command'] == 'getChartLastRequest':
+        return answer({'digits': 1, 'rateInfos': [
+            {'ctm': 60000, 'open': 10, 'close': 1, 'high': 2, 'low': -1,
+             'vol': 5.0}]})
+    if request['command'] == 'getTradingHours':
+        now = datetime.fromtimestamp(time.time() + SKEW)
+        start = (now.hour * 3600 + now.minute * 60) * 1000 - 60000
+        return answer([{'symbol': 'EURUSD', 'trading': [
+            {'day': now.isoweekday(), 'fromT': start, 'toT': start + 300000}],
+            'quotes': []}])
+    raise AssertionError(request['command'])
+
+
+def _commands(client, name):
+    return [req for req in client.ws.sent if req['command'] == name]
+
+
+def test_sync_clock(offline_client):
+    client = offline_client(_responder, Client)
+    before = client.server_now()
+    assert before == pytest.approx(time.time(), abs=1)
+    offset = client.sync_clock(samples=3)
+    assert offset == pytest.approx(SKEW, abs=1)
+    assert len(_commands(client, 'getServerTime')) == 3
+    first = client.server_now()
+    assert first == pytest.approx(time.time() + SKEW, abs=1)
+    assert client.server_now() >= first
+    assert client.clock.rtt >= 0
+    assert len(_commands(client, 'getServerTime')) == 3
+
+
+def test_resync_when_stale(offline_client):
+    client = offline_client(_responder, Client)
+    client.sync_clock(samples=1, interval=0)
+    client.server_now()
+    assert len(_commands(client, 'getServerTime')) == 2
+
+
+def test_background_resync_in_thread_safe_mode(offline_client):
+    client = offline_client(_responder, Client)
+    client.sync_clock(samples=1, interval=0)
+    client.clock.samples = 3
+    client.start_io_thread()
+    slow = client.ws.responder
+
+    def _slow(request):
+        time.sleep(0.1)
+        return slow(request)
+    client.ws.responder = _slow
+    start = time.monotonic()
+    assert client.server_now() == pytest.approx(time.time() + SKEW, abs=1)
+    assert time.monotonic() - start < 0.05
+    client.clock._resync.join(5)
+    client.stop_io_thread()
+    assert len(_commands(client, 'getServerTime')) == 4
+
+
+def test_helpers_use_server_time(offline_client):
+    client = offline_client(_responder, Client)
+    client.sync_clock(samples=1)
+    client.get_lastn_candle_history('EURUSD', 60, 1)
+    start = _commands(client, 'getChartLastRequest')[0]['arguments']['info'][
+        'start'] / 1000
+    assert start == pytest.approx(time.time() + SKEW - 60, abs=1)
+    assert client.check_if_market_open(['EURUSD']) == {'EURUSD': True}
+    assert client.expiration_stamp(10) / 1000 == \
+        pytest.approx(time.time() + SKEW + 600, abs=1)
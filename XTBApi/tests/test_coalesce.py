@@ -0,0 +1,159 @@
+"""
+tests.test_coalesce.py
+~~~~~~~
+
+test the merging of the requests of many threads
+"""
+
+import threading
+import time
+
+import pytest
+
+from XTBApi.api import Client
+from XTBApi.coalesce import Coalescer
+from XTBApi.dispatcher import HIGH_PRIORITY
+from XTBApi.exceptions import CommandFailed
+from XTBApi.tests.fake import answer
+
+
+def _responder(request):
+    args = request.get('arguments', {})
+    if request['command'] == 'getMarginLevel':
+        return answer({'margin_level': 100.0})
+    if request['command'] == 'getTickPrices':
+        return answer({'quotations': [{'symbol': symbol, 'bid': 1.0}
+                                      for symbol in args['symbols']]})
+    if request['command'] == 'getTradeRecords':
+        return answer([{'order': order} for order in args['orders']])
+    raise AssertionError(request['command'])
+
+
+def _in_threads(job, count):
+    results = [None] * count
+
+    def _worker(index):
+        results[index] = job(index)
+    threads = [threading.Thread(target=_worker, args=(x,))
+               for x in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _commands(client):
+    return [request['command'] for request in client.ws.sent]
+
+
+def test_identical_reads_sent_once(offline_client):
+    client = offline_client(_responder, Client)
+    with Coalescer(client, window=0.05) as coalescer:
+        results = _in_threads(lambda index: coalescer.get_margin_level(), 10)
+    assert _commands(client) == ['getMarginLevel']
+    assert coalescer.requests == 10 and coalescer.sent == 1
+    assert all(res == {'margin_level': 100.0} for res in results)
+    assert results[0] is not results[1]
+
+
+def test_symbol_reads_merged(offline_client):
+    client = offline_client(_responder, Client)
+    with Coalescer(client, window=0.05) as coalescer:
+        results = _in_threads(lambda index: coalescer.get_tick_prices(
+            [f"SYM{index % 3}", 'EURUSD'], 0), 6)
+        records = _in_threads(
+            lambda index: coalescer.get_trade_records([index]), 4)
+    assert sorted(_commands(client)) == ['getTickPrices', 'getTradeRecords']
+    sent = client.ws.sent[_commands(client).index('getTickPrices')]
+    assert sorted(sent['arguments']['symbols']) == \
+        ['EURUSD', 'SYM0', 'SYM1', 'SYM2']
+    assert sorted(quote['symbol'] for quote in results[4]['quotations']) == \
+        ['EURUSD', 'SYM1']
+    assert records == [[{'order': index}] for index in range(4)]
+
+
+class FailingClient(object):
+    def __init__(self):
+        self.calls = []
+
+    def call_context(self):
+        return None, None, None
+
+    def get_symbol(self, symbol):
+        self.calls.append(symbol)
+        if symbol == 'MISSING':
+            raise CommandFailed({'errorCode': 'BE004'})
+        return {'symbol': symbol}
+
+    def get_tick_prices(self, symbols, start, level=0):
+        self.calls.append(list(symbols))
+        if 'BAD' in symbols:
+            raise CommandFailed({'errorCode': 'BE004'})
+        return {'quotations': [{'symbol': symbol} for symbol in symbols]}
+
+
+def test_errors_reach_every_caller():
+    client = FailingClient()
+    errors = []
+
+    def _job(index):
+        try:
+            return coalescer.get_symbol('MISSING' if index < 2 else 'EURUSD')
+        except CommandFailed as exc:
+            errors.append(exc)
+    with Coalescer(client, window=0.05) as coalescer:
+        results = _in_threads(_job, 4)
+    assert len(errors) == 2
+    assert results[2:] == [{'symbol': 'EURUSD'}] * 2
+    assert sorted(client.calls) == ['EURUSD', 'MISSING']
+
+
+class ContextClient(Client):
+    """records the call context of the requests it sends"""
+    def __init__(self):
+        super().__init__()
+        self.contexts = []
+
+    def get_margin_level(self):
+        self.contexts.append(self.call_context())
+        return super().get_margin_level()
+
+
+def test_one_bad_symbol_fails_its_caller_only():
+    client = FailingClient()
+
+    def _job(index):
+        try:
+            return coalescer.get_tick_prices(['BAD' if index == 0 else
+                                              f"SYM{index}"], 0)
+        except CommandFailed as exc:
+            return exc
+    with Coalescer(client, window=0.05) as coalescer:
+        results = _in_threads(_job, 3)
+    assert isinstance(results[0], CommandFailed)
+    assert results[1:] == [{'quotations': [{'symbol': 'SYM1'}]},
+                           {'quotations': [{'symbol': 'SYM2'}]}]
+    assert len(client.calls) == 4
+
+
+def test_callers_context_is_kept(offline_client):
+    client = offline_client(_responder, ContextClient)
+    deadline = time.monotonic() + 30
+
+    def _job(index):
+        if index == 0:
+            with client.deadline(deadline):
+                return coalescer.get_margin_level()
+        with client.call_options(priority=HIGH_PRIORITY, timeout=index):
+            return coalescer.get_margin_level()
+    with Coalescer(client, window=0.05) as coalescer:
+        _in_threads(_job, 3)
+    assert client.contexts == [(deadline, HIGH_PRIORITY, 1)]
+
+
+def test_stopped():
+    coalescer = Coalescer(None)
+    coalescer.stop()
+    with pytest.raises(RuntimeError):
+        coalescer.get_margin_level()
@@ -0,0 +1,96 @@
+"""
+tests.test_deadline.py
+~~~~~~~
+
+test timeouts and deadlines
+"""
+
+import socket
+import time
+
+import pytest
+
+from XTBApi.api import Client
+from XTBApi.exceptions import DeadlineExceeded, RequestTimeout
+from XTBApi.tests.fake import FakeSocket, answer
+
+
+class SlowSocket(FakeSocket):
+    """answers after delay seconds, honouring settimeout"""
+    def __init__(self, responder, delay):
+        super().__init__(responder)
+        self.delay = delay
+        self.timeout = None
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def recv(self):
+        if self.timeout is not None and self.delay > self.timeout:
+            time.sleep(self.timeout)
+            raise socket.timeout()
+        time.sleep(self.delay)
+        return super().recv()
+
+
+def _responder(request):
+    if request['command'] == 'getSymbol':
+        return answer({'symbol': 'EURUSD', 'ask': 1.1, 'bid': 1.0,
+                       'high': 1.2, 'low': 0.9, 'lotStep': 0.01})
+    if request['command'] == 'tradeTransactionStatus':
+        return answer({'requestStatus': 3, 'message': None})
+    if request['command'] == 'getTrades':
+        return answer([])
+    return answer({'order': 1})
+
+
+def _reconnect_to(monkeypatch, responder):
+    monkeypatch.setattr(Client, '_connect',
+                        lambda self, mode, timeout=None: FakeSocket(responder))
+
+
+def test_read_timeout_resets_connection(offline_client, monkeypatch):
+    client = offline_client(_responder, Client)
+    client.ws = SlowSocket(_responder, 0.5)
+    client.read_timeout = 0.05
+    with pytest.raises(RequestTimeout):
+        client.get_symbol('EURUSD')
+    assert client.ws is None
+    _reconnect_to(monkeypatch, _responder)
+    assert client.get_symbol('EURUSD')['symbol'] == 'EURUSD'
+    assert [req['command'] for req in client.ws.sent] == ['login', 'getSymbol']
+
+
+def test_deadline_on_command(offline_client):
+    client = offline_client(_responder, Client)
+    client.ws = SlowSocket(_responder, 0.5)
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        client.get_symbol('EURUSD', deadline=time.monotonic() + 0.1)
+    assert time.monotonic() - start < 0.3
+
+
+def test_deadline_propagates_to_composite(offline_client):
+    client = offline_client(_responder, Client)
+    client.max_time_interval = 0.1
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        client.open_trade('buy', 'EURUSD', 0.1,
+                          deadline=time.monotonic() + 0.25)
+    assert time.monotonic() - start < 0.3
+    assert len(client.ws.sent) < 5
+    client.max_time_interval = 0
+    assert client.open_trade('buy', 'EURUSD', 0.1,
+                             deadline=time.monotonic() + 1) == {'order': 1}
+
+
+def test_deadline_in_thread_safe_mode(offline_client):
+    client = offline_client(_responder, Client)
+    client.ws = SlowSocket(_responder, 0.5)
+    client.start_io_thread()
+    try:
+        with pytest.raises(DeadlineExceeded):
+            with client.deadline(time.monotonic() + 0.1):
+                client.get_symbol('EURUSD')
+    finally:
+        client.stop_io_thread()
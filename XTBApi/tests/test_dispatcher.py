@@ -0,0 +1,154 @@
+"""
+tests.test_dispatcher.py
+~~~~~~~
+
+test the thread-safe mode of the client
+"""
+
+import socket
+import threading
+import time
+
+import pytest
+
+from XTBApi.api import Client
+from XTBApi.dispatcher import HIGH_PRIORITY, LOW_PRIORITY, Dispatcher
+from XTBApi.exceptions import IOThreadStopped, RequestTimeout
+from XTBApi.tests.fake import FakeSocket, answer
+
+
+class StrictSocket(FakeSocket):
+    """fails if frames of two requests interleave"""
+    def __init__(self, responder):
+        super().__init__(responder)
+        self.threads = set()
+
+    def send(self, frame):
+        assert not self._pending, "send before the previous recv"
+        self.threads.add(threading.get_ident())
+        time.sleep(0.001)
+        super().send(frame)
+
+    def recv(self):
+        self.threads.add(threading.get_ident())
+        return super().recv()
+
+
+def _responder(request):
+    args = request.get('arguments', {})
+    if request['command'] == 'getSymbol':
+        return answer({'symbol': args['symbol']})
+    return answer({'order': args.get('tradeTransInfo', {}).get('volume')})
+
+
+def test_threads_share_one_session(offline_client):
+    client = offline_client(_responder, Client)
+    client.ws = StrictSocket(_responder)
+    client.start_io_thread()
+    errors = []
+
+    def _worker(index):
+        try:
+            for _ in range(10):
+                symbol = f"SYM{index}"
+                assert client.get_symbol(symbol)['symbol'] == symbol
+                response = client.trade_transaction(symbol, 0, 0, index + 1.0,
+                                                    price=1.0)
+                assert response['order'] == index + 1.0
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+    threads = [threading.Thread(target=_worker, args=(x,)) for x in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    client.stop_io_thread()
+    assert not errors
+    assert len(client.ws.threads) == 1
+    assert len(client.ws.sent) == 160
+
+
+def test_priorities_and_timeout():
+    dispatcher = Dispatcher()
+    release = threading.Event()
+    order = []
+    dispatcher.submit(release.wait)
+    low = dispatcher.submit(lambda: order.append('low'), LOW_PRIORITY)
+    high = dispatcher.submit(lambda: order.append('high'), HIGH_PRIORITY)
+    with pytest.raises(RequestTimeout):
+        dispatcher.call(lambda: order.append('late'), timeout=0.05)
+    release.set()
+    low.result(1)
+    high.result(1)
+    dispatcher.stop()
+    assert order == ['high', 'low']
+
+
+def test_call_options(offline_client):
+    client = offline_client(_responder, Client)
+    client.start_io_thread()
+    client.ws.recv = lambda: time.sleep(0.2)
+    with client.call_options(timeout=0.05):
+        with pytest.raises(RequestTimeout):
+            client.get_symbol('EURUSD')
+    client.stop_io_thread()
+
+
+class StalledSocket(FakeSocket):
+    """never answers, honours its timeout like a real socket"""
+    timeout = None
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def recv(self):
+        if self.timeout is None:
+            raise AssertionError("recv without timeout would hang")
+        time.sleep(self.timeout)
+        raise socket.timeout()
+
+
+class ReconnectingClient(Client):
+    def _connect(self, mode, timeout=None):
+        return FakeSocket(_responder)
+
+
+def test_timeout_bounds_the_running_job(offline_client):
+    client = offline_client(_responder, ReconnectingClient)
+    stalled = client.ws = StalledSocket(_responder)
+    client.start_io_thread()
+    client.request_timeout = 0.1
+    with pytest.raises(RequestTimeout):
+        client.get_symbol('EURUSD')
+    assert 0 < stalled.timeout <= 0.1
+    assert client.get_symbol('EURUSD') == {'symbol': 'EURUSD'}
+    assert not stalled.connected
+    client.stop_io_thread()
+
+
+def test_overrun_resets_on_io_thread():
+    dispatcher = Dispatcher()
+    release = threading.Event()
+    threads = []
+    with pytest.raises(RequestTimeout):
+        dispatcher.call(release.wait, timeout=0.05,
+                        on_overrun=lambda: threads.append(
+                            dispatcher.in_io_thread()))
+    release.set()
+    dispatcher.stop()
+    assert threads == [True]
+
+
+def test_no_job_left_after_stop(offline_client):
+    client = offline_client(_responder, Client)
+    client.start_io_thread()
+    dispatcher = client._dispatcher
+    release = threading.Event()
+    queued = dispatcher.submit(release.wait)
+    late = dispatcher.submit(lambda: 'done', LOW_PRIORITY)
+    threading.Timer(0.05, release.set).start()
+    client.stop_io_thread()
+    assert queued.result(0) and late.result(0) == 'done'
+    with pytest.raises(IOThreadStopped):
+        dispatcher.call(lambda: 'never run')
+    assert client.get_symbol('EURUSD') == {'symbol': 'EURUSD'}
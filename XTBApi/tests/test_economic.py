@@ -0,0 +1,66 @@
+"""
+tests.test_economic.py
+~~~~~~~
+
+test the economic calendar index
+"""
+
+from XTBApi.api import Client
+from XTBApi.economic import HIGH_IMPACT, EconomicCalendar, symbol_countries
+from XTBApi.tests.fake import answer
+
+NOW = 1700000000
+
+
+def _event(country, title, minutes, impact='3', current=''):
+    return {'country': country, 'title': title, 'period': '(Oct)',
+            'impact': impact, 'current': current, 'forecast': '1.0%',
+            'previous': '0.9%', 'time': (NOW + minutes * 60) * 1000}
+
+
+CALENDAR = [_event('US', 'CPI', 10), _event('DE', 'ZEW', -5, '2'),
+            _event('JP', 'GDP', 90), _event('US', 'NFP', -120)]
+
+
+def _calendar(offline_client, records=CALENDAR):
+    client = offline_client(lambda req: answer(records), Client)
+    calendar = EconomicCalendar(client)
+    assert calendar.refresh() == []
+    return calendar
+
+
+def test_symbol_countries():
+    assert symbol_countries('EURUSD') == ('EMU', 'EU', 'DE', 'FR', 'IT', 'ES',
+                                          'US')
+    assert symbol_countries('AAPL.US_9') == ('US',)
+    assert symbol_countries('OIL.WTI') == ('US',)
+    assert 'DE' in symbol_countries('DE30')
+    assert symbol_countries('BITCOIN') is None
+
+
+def test_queries_without_requests(offline_client):
+    calendar = _calendar(offline_client)
+    assert [ev['title'] for ev in calendar.upcoming(60, now=NOW)] == ['CPI']
+    assert calendar.upcoming(60, 'USDJPY', now=NOW)[0]['title'] == 'CPI'
+    assert calendar.upcoming(60, 'EURGBP', now=NOW) == []
+    assert [ev['title'] for ev in calendar.events_between(
+        NOW - 3600, NOW + 3600, ['US', 'DE'])] == ['ZEW', 'CPI']
+    assert calendar.has_event_near('EURUSD', now=NOW)
+    assert calendar.has_event_near('DE30', min_impact=2, now=NOW)
+    assert calendar.has_event_near('US500', now=NOW)
+    assert calendar.has_event_near('GOLD', now=NOW)
+    assert calendar.has_event_near('BITCOIN', now=NOW)
+    assert not calendar.has_event_near('AUDNZD', now=NOW)
+    assert not calendar.has_event_near('ZEW.DE', min_impact=HIGH_IMPACT,
+                                       now=NOW)
+    assert len(calendar.client.ws.sent) == 1
+
+
+def test_refresh_reports_changes(offline_client):
+    records = list(CALENDAR)
+    calendar = _calendar(offline_client, records)
+    records[3] = _event('US', 'NFP', -120, current='250K')
+    records.append(_event('UK', 'BoE', 30))
+    changed = calendar.refresh()
+    assert [(ev['title'], ev['current']) for ev in changed] == [
+        ('NFP', '250K'), ('BoE', '')]
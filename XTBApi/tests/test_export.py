@@ -0,0 +1,115 @@
+"""
+tests.test_export.py
+~~~~~~~
+
+test the trades history export
+"""
+
+import csv
+import json
+
+import pytest
+
+from XTBApi.api import Client
+from XTBApi.export import (Checkpoint, CSVWriter, JSONLinesWriter,
+                           ParquetWriter, export_accounts,
+                           export_trades_history)
+from XTBApi.tests.fake import answer
+
+DAY = 24 * 3600
+HISTORY = [{'order': x, 'symbol': 'EURUSD', 'cmd': 0, 'volume': 0.1,
+            'close_time': (x * DAY // 2) * 1000, 'profit': 1.0}
+           for x in range(1, 40)]
+
+
+def _responder(request):
+    args = request['arguments']
+    return answer([rec for rec in HISTORY
+                   if args['start'] <= rec['close_time'] <= args['end']])
+
+
+def test_export_in_windows(offline_client, tmp_path):
+    client = offline_client(_responder, Client)
+    filename = str(tmp_path / 'trades.jsonl')
+    with JSONLinesWriter(filename) as writer:
+        count = export_trades_history(client, writer, 0, 10 * DAY,
+                                      window=3 * DAY, batch_size=4)
+    assert count == 19
+    assert len(client.ws.sent) == 4
+    with open(filename) as file:
+        orders = [json.loads(line)['order'] for line in file]
+    assert orders == list(range(1, 20))
+
+
+def test_export_is_incremental(offline_client, tmp_path):
+    client = offline_client(_responder, Client)
+    filename = str(tmp_path / 'trades.csv')
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.json'))
+    with CSVWriter(filename) as writer:
+        assert export_trades_history(client, writer, 0, 10 * DAY,
+                                     checkpoint) == 19
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.json'))
+    assert checkpoint.get('default') == (HISTORY[18]['close_time'], 19)
+    with CSVWriter(filename) as writer:
+        assert export_trades_history(client, writer, 0, 20 * DAY,
+                                     checkpoint) == 20
+    with open(filename, newline='') as file:
+        orders = [int(row['order']) for row in csv.DictReader(file)]
+    assert orders == list(range(1, 40))
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingWriter(JSONLinesWriter):
+    """fails after writing its first batch"""
+    def write_batch(self, records):
+        if getattr(self, 'written', False):
+            raise Crash()
+        super().write_batch(records)
+        self.written = True
+
+
+def test_checkpoint_inside_same_close_time(offline_client, tmp_path):
+    history = [{'order': order, 'symbol': 'EURUSD', 'close_time': close_time}
+               for order, close_time in ((1, 1000), (2, 2000), (3, 2000),
+                                         (4, 3000))]
+    client = offline_client(lambda request: answer(history), Client)
+    filename = str(tmp_path / 'trades.jsonl')
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.json'))
+    with pytest.raises(Crash):
+        with CrashingWriter(filename) as writer:
+            export_trades_history(client, writer, 0, 10, checkpoint,
+                                  batch_size=2)
+    with JSONLinesWriter(filename) as writer:
+        assert export_trades_history(client, writer, 0, 10, checkpoint) == 2
+    with open(filename) as file:
+        orders = [json.loads(line)['order'] for line in file]
+    assert orders == [1, 2, 3, 4]
+
+
+def test_checkpoint_of_older_versions(tmp_path):
+    filename = str(tmp_path / 'checkpoint.json')
+    with open(filename, 'w') as file:
+        json.dump({'default': 2000}, file)
+    assert Checkpoint(filename).get('default') == (2000, float('inf'))
+
+
+def test_export_accounts(offline_client, tmp_path):
+    clients = {name: offline_client(_responder, Client)
+               for name in ('first', 'second')}
+    counts = export_accounts(
+        clients, lambda key: JSONLinesWriter(str(tmp_path / f"{key}.jsonl")),
+        0, 5 * DAY)
+    assert counts == {'first': 9, 'second': 9}
+
+
+def test_parquet(offline_client, tmp_path):
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+    client = offline_client(_responder, Client)
+    with ParquetWriter(str(tmp_path)) as writer:
+        export_trades_history(client, writer, 0, 10 * DAY, batch_size=5)
+    assert len(writer.filenames) == 4
+    table = pyarrow_parquet.read_table(str(tmp_path))
+    assert sorted(table.column('order').to_pylist()) == list(range(1, 20))
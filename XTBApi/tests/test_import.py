@@ -0,0 +1,34 @@
+"""
+tests.test_import.py
+~~~~~~~
+
+test that importing the package stays cheap
+"""
+
+import subprocess
+import sys
+
+CHECK_IMPORT = """
+import logging, sys
+import XTBApi.api
+assert 'websocket' not in sys.modules, 'websocket imported eagerly'
+eager = [name for name in ('concurrent.futures', 'decimal', 'XTBApi.clock',
+                           'XTBApi.dispatcher', 'XTBApi.quotes',
+                           'XTBApi.sizing', 'XTBApi.standby')
+         if name in sys.modules]
+assert not eager, eager
+handlers = logging.getLogger('XTBApi').handlers
+assert all(isinstance(h, logging.NullHandler) for h in handlers), handlers
+"""
+
+
+def test_import_is_lazy():
+    subprocess.run([sys.executable, '-c', CHECK_IMPORT], check=True)
+
+
+def test_setup_logging(tmp_path):
+    logfile = tmp_path / 'xtb.log'
+    code = (f"import logging, XTBApi; XTBApi.setup_logging({str(logfile)!r}); "
+            f"logging.getLogger('XTBApi.api').debug('hello')")
+    subprocess.run([sys.executable, '-c', code], check=True)
+    assert 'hello' in logfile.read_text()
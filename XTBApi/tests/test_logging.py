@@ -0,0 +1,41 @@
+"""
+tests.test_logging.py
+~~~~~~~
+
+test the logging of commands
+"""
+
+import logging
+
+import XTBApi.api
+from XTBApi.api import BaseClient
+from XTBApi.tests.fake import answer
+
+
+def test_payload_is_truncated(offline_client, caplog):
+    symbols = [{'symbol': f"SYM{x}", 'description': 'x' * 1000}
+               for x in range(5000)]
+    client = offline_client(lambda req: answer(symbols), BaseClient)
+    with caplog.at_level(logging.DEBUG, logger='XTBApi'):
+        assert client.get_all_symbols() == symbols
+    assert max(len(rec.getMessage()) for rec in caplog.records) < 2000
+
+
+def test_no_payload_repr_when_disabled(offline_client, caplog, monkeypatch):
+    client = offline_client(lambda req: answer([1, 2]), BaseClient)
+    calls = []
+    monkeypatch.setattr(XTBApi.api._PAYLOAD_REPR, 'repr',
+                        lambda obj: calls.append(obj) or '')
+    with caplog.at_level(logging.INFO, logger='XTBApi'):
+        client.get_all_symbols()
+    assert not calls
+    with caplog.at_level(logging.DEBUG, logger='XTBApi'):
+        client.get_all_symbols()
+    assert calls == [[1, 2]]
+
+
+def test_trade_transaction_log_names(offline_client, caplog):
+    client = offline_client(lambda req: answer({'order': 1}), BaseClient)
+    with caplog.at_level(logging.INFO, logger='XTBApi'):
+        client.trade_transaction('EURUSD', 1, 2, 1.0, price=1.1)
+    assert "mode SELL with type CLOSE" in caplog.text
@@ -0,0 +1,60 @@
+"""
+tests.test_offload.py
+~~~~~~~
+
+test the decoding of large responses in worker pools
+"""
+
+import pytest
+
+from XTBApi.api import Client
+from XTBApi.exceptions import CommandFailed
+from XTBApi.offload import OffloadPool
+from XTBApi.tests.fake import answer
+
+CANDLES = {'digits': 2, 'rateInfos': [
+    {'ctm': (1700000000 + x * 60) * 1000, 'open': 10000 + x, 'close': 5,
+     'high': 10, 'low': -10, 'vol': 3.0} for x in range(2000)]}
+SYMBOLS = [{'symbol': f"SYM{x}", 'ask': 1.5, 'bid': 1.25, 'lotStep': 0.01,
+            'currency': 'USD', 'precision': 2} for x in range(2000)]
+
+
+def _responder(request):
+    if request['command'] == 'getAllSymbols':
+        return answer(SYMBOLS)
+    if request['command'] == 'getTradesHistory':
+        return {'status': False, 'errorCode': 'BE005', 'errorDescr': 'x'}
+    return answer(CANDLES)
+
+
+@pytest.mark.parametrize('kind', ['process', 'thread'])
+def test_offloaded_conversion(offline_client, kind):
+    client = offline_client(_responder, Client)
+    with OffloadPool(kind, max_workers=1, threshold=1000) as pool:
+        candles = pool.chart_range(client, 'EURUSD', 1, 0, 1).result()
+        symbols = pool.all_symbols(client).result()
+        with pytest.raises(CommandFailed):
+            pool.trades_history(client, 0, 0).result()
+    with candles, symbols:
+        assert len(candles) == 2000
+        assert candles.column('close')[1] == 100.06
+        assert candles.column('timestamp')[0] == 1700000000
+        assert list(symbols.column('bid')[:2]) == [1.25, 1.25]
+        assert symbols.column('symbol')[-1] == 'SYM1999'
+
+
+def test_small_responses_inline(offline_client):
+    client = offline_client(_responder, Client)
+    pool = OffloadPool('thread', max_workers=1)
+    future = pool.chart_range(client, 'EURUSD', 1, 0, 1)
+    assert future.done()
+    assert future.result().column('open')[0] == 100.0
+    pool.shutdown()
+
+
+def test_chart_range_ticks_checked(offline_client):
+    client = offline_client(_responder, Client)
+    with OffloadPool('thread', max_workers=1) as pool:
+        with pytest.raises(ValueError):
+            pool.chart_range(client, 'EURUSD', 1, 0, 1, ticks=1.5)
+    assert client.ws.sent == []
@@ -0,0 +1,41 @@
+"""
+tests.test_quotes.py
+~~~~~~~
+
+test the multi symbol quotes snapshot
+"""
+
+from XTBApi.api import Client
+from XTBApi.tests.fake import answer
+
+
+def _quote(symbol, timestamp):
+    return {'symbol': symbol, 'ask': 1.2, 'bid': 1.1, 'askVolume': 1000,
+            'bidVolume': 500, 'high': 1.3, 'low': 1.0, 'level': 0,
+            'spreadRaw': 0.1, 'spreadTable': 1.0, 'timestamp': timestamp}
+
+
+def _responder(request):
+    args = request['arguments']
+    return answer({'quotations': [
+        _quote(symbol, 2000000) for symbol in args['symbols']
+        if args['timestamp'] < 2000000 or symbol == 'SYM1']})
+
+
+def test_get_quotes_in_chunks(offline_client):
+    client = offline_client(_responder, Client)
+    symbols = [f"SYM{x}" for x in range(500)]
+    table = client.get_quotes(symbols, chunk_size=200)
+    assert len(client.ws.sent) == 3
+    assert list(table) == symbols
+    assert table['SYM42']['ask'] == 1.2
+    assert table['SYM42']['timestamp'] == 2000
+    assert len(table.column('bid')) == 500
+
+
+def test_poll_quotes(offline_client):
+    client = offline_client(_responder, Client)
+    table = client.get_quotes(['SYM0', 'SYM1'])
+    assert client.poll_quotes(table) == ['SYM1']
+    assert client.ws.sent[-1]['arguments']['timestamp'] == 2000000
+    assert len(table) == 2
@@ -0,0 +1,73 @@
+"""
+tests.test_recorder.py
+~~~~~~~
+
+test the session recorder and replay
+"""
+
+import gzip
+
+import pytest
+
+from XTBApi.api import Client
+from XTBApi.exceptions import ReplayMismatch
+from XTBApi.recorder import ReplayClient, SessionRecorder, read_session
+from XTBApi.tests.fake import FakeSocket, answer
+
+
+def _responder(request):
+    if request['command'] == 'getSymbol':
+        return answer({'symbol': request['arguments']['symbol'], 'ask': 1.1})
+    return answer({'version': '2.5.0'})
+
+
+def _record(offline_client, filename, **kwargs):
+    client = offline_client(_responder, Client)
+    with SessionRecorder(filename, **kwargs) as recorder:
+        client.recorder = recorder
+        client.login('user', 'secret')
+        for symbol in ['EURUSD', 'GBPUSD', 'USDJPY']:
+            client.get_symbol(symbol)
+        client.get_version()
+
+
+@pytest.fixture(autouse=True)
+def _no_network(monkeypatch):
+    monkeypatch.setattr(Client, '_connect', lambda self, mode, timeout=None: FakeSocket(_responder))
+
+
+def test_record_and_replay(offline_client, tmp_path):
+    filename = str(tmp_path / 'session.jsonl.gz')
+    _record(offline_client, filename)
+    records = list(read_session(filename))
+    assert [rec['kind'] for rec in records] == ['command'] * 5
+    assert 'secret' not in gzip.open(filename, 'rt').read()
+    client = ReplayClient(filename, strict=True)
+    client.login('user')
+    assert client.get_symbol('EURUSD') == {'symbol': 'EURUSD', 'ask': 1.1}
+    with pytest.raises(ReplayMismatch):
+        client.get_symbol('USDJPY')
+
+
+def test_mismatch_is_not_retried(offline_client, tmp_path):
+    filename = str(tmp_path / 'session.jsonl.gz')
+    _record(offline_client, filename)
+    client = ReplayClient(filename)
+    client.login()
+    client.get_symbol('EURUSD')
+    client.get_symbol('GBPUSD')
+    client.get_symbol('USDJPY')
+    with pytest.raises(ReplayMismatch):
+        client.get_symbol('EURUSD')
+
+
+def test_rotation(offline_client, tmp_path):
+    filename = str(tmp_path / 'session.jsonl.gz')
+    _record(offline_client, filename, max_bytes=300, backup_count=10)
+    assert (tmp_path / 'session.jsonl.gz.1').exists()
+    client = ReplayClient(filename)
+    client.login()
+    assert client.get_symbol('EURUSD')['symbol'] == 'EURUSD'
+    assert client.get_symbol('GBPUSD')['symbol'] == 'GBPUSD'
+    assert client.get_symbol('USDJPY')['symbol'] == 'USDJPY'
+    assert client.get_version() == {'version': '2.5.0'}
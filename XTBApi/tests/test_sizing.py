@@ -0,0 +1,80 @@
+"""
+tests.test_sizing.py
+~~~~~~~
+
+test the batch order sizing
+"""
+
+import pytest
+
+from XTBApi.api import Client
+from XTBApi.sizing import round_to_step, size_orders
+from XTBApi.tests.fake import answer
+
+SPECS = {
+    'ETHEREUM': {'symbol': 'ETHEREUM', 'lotStep': 0.01, 'lotMin': 0.01,
+                 'lotMax': 50.0, 'precision': 2, 'contractSize': 1,
+                 'ask': 1800.55, 'bid': 1799.45},
+    'VWCE.DE_9': {'symbol': 'VWCE.DE_9', 'lotStep': 0.25, 'lotMin': 1.0,
+                  'lotMax': 1000.0, 'precision': 3, 'contractSize': 1,
+                  'ask': 101.234, 'bid': 101.1},
+    'EURUSD': {'symbol': 'EURUSD', 'lotStep': 0.01, 'lotMin': 0.01,
+               'lotMax': 100.0, 'precision': 5, 'contractSize': 100000,
+               'ask': 1.10012, 'bid': 1.1001},
+}
+
+
+@pytest.mark.parametrize('volume,step,expected', [
+    (1.234, 0.01, 1.23), (1.26, 0.1, 1.3), (17.4, 1.0, 17.0),
+    (1234.0, 100.0, 1200.0), (7.4, 0.25, 7.5), (0.13, 0.05, 0.15),
+    (3.0, 0, 3.0)])
+def test_round_to_step(volume, step, expected):
+    assert round_to_step(volume, step) == expected
+
+
+def test_size_orders():
+    orders = size_orders(
+        SPECS, ['ETHEREUM', 'VWCE.DE_9', 'EURUSD', 'VWCE.DE_9'],
+        ['buy', 'sell', 0, 'buy'], dollars=[1000, 750, 55000, 10],
+        sl_pers=[0.05, 0.05, 0.0, 0.0], tp_pers=[0.1, 0.1, 0.0, 0.0])
+    assert orders['volume'] == [0.56, 7.5, 0.5, 1.0]
+    assert orders['price'] == [1800.55, 101.1, 1.10012, 101.234]
+    assert orders['sl'] == [1710.52, 106.155, 0.0, 0.0]
+    assert orders['tp'] == [1980.61, 90.99, 0.0, 0.0]
+    assert orders['mode'] == [0, 1, 0, 0]
+
+
+class Column(list):
+    """sequence without a truth value, like numpy arrays"""
+    def __bool__(self):
+        raise ValueError("truth value of an array is ambiguous")
+
+
+def test_size_orders_of_arrays():
+    orders = size_orders(SPECS, Column(['ETHEREUM']), Column(['buy']),
+                         prices=Column([1800.0]), dollars=Column([900.0]),
+                         sl_pers=Column([0.0]), tp_pers=Column([0.0]))
+    assert orders['volume'] == [0.5]
+
+
+def test_size_orders_lengths():
+    with pytest.raises(ValueError):
+        size_orders(SPECS, ['ETHEREUM'] * 3, ['buy'] * 3, dollars=[100, 200])
+    with pytest.raises(ValueError):
+        size_orders(SPECS, ['ETHEREUM'] * 3, ['buy'] * 2, volumes=[1.0] * 3)
+
+
+def test_size_orders_needs_an_amount():
+    with pytest.raises(ValueError, match="volumes or dollars required"):
+        size_orders(SPECS, ['ETHEREUM'], ['buy'])
+    with pytest.raises(ValueError):
+        size_orders(SPECS, ['ETHEREUM'] * 2, ['buy'] * 2, dollars=[100, None])
+
+
+def test_client_size_orders(offline_client):
+    client = offline_client(lambda req: answer(list(SPECS.values())), Client)
+    orders = client.size_orders(['ETHEREUM'] * 300, ['sell'] * 300,
+                                volumes=[100.0] * 300)
+    assert len(client.ws.sent) == 1
+    assert orders['volume'] == [50.0] * 300
+    assert orders['price'][0] == 1799.45
@@ -0,0 +1,135 @@
+"""
+tests.test_standby.py
+~~~~~~~
+
+test the failover to the hot standby session
+"""
+
+import threading
+import time
+
+import pytest
+
+from XTBApi.api import Client
+from XTBApi.exceptions import NotLogged
+from XTBApi.standby import StandbySession
+from XTBApi.tests.fake import FakeSocket, answer
+
+
+def _responder(request):
+    if request['command'] in ('login', 'ping'):
+        return {'status': True}
+    return answer({'symbol': request['arguments']['symbol']})
+
+
+class DroppingSocket(FakeSocket):
+    """FakeSocket raising like a dropped connection once closed"""
+    def send(self, frame):
+        if not self.connected:
+            raise ConnectionResetError("connection reset by peer")
+        super().send(frame)
+
+
+class StandbyClient(Client):
+    def __init__(self):
+        super().__init__()
+        self.sockets = []
+
+    def _connect(self, mode, timeout=None):
+        ws = DroppingSocket(_responder)
+        self.sockets.append((mode, ws))
+        return ws
+
+
+def _wait(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.005)
+
+
+def test_failover_to_standby(offline_client):
+    client = offline_client(_responder, StandbyClient)
+    client.ws = DroppingSocket(_responder)
+    client._login_data = ('user', 'password', 'real')
+    client.start_standby(ping_interval=0.01)
+    standby = client._standby
+    _wait(lambda: standby.ready and
+          any(req['command'] == 'ping' for req in client.sockets[0][1].sent))
+    first_mode, first = client.sockets[0]
+    assert first_mode == 'real'
+    assert first.sent[0] == {'command': 'login', 'arguments': {
+        'userId': 'user', 'password': 'password'}}
+    client.ws.close()
+    assert client.get_symbol('EURUSD') == {'symbol': 'EURUSD'}
+    assert client.ws is first
+    assert first.sent[-1]['command'] == 'getSymbol'
+    _wait(lambda: standby.built == 2)
+    assert len(client.sockets) == 2
+    client.stop_standby()
+    assert not client.sockets[1][1].connected
+
+
+def test_relogin_without_standby(offline_client):
+    client = offline_client(_responder, StandbyClient)
+    client.ws = DroppingSocket(_responder)
+    client._login_data = ('user', 'password', 'real')
+    client.ws.close()
+    assert client.get_symbol('EURUSD') == {'symbol': 'EURUSD'}
+    assert [mode for mode, _ in client.sockets] == ['real']
+    assert client.ws.sent[0]['command'] == 'login'
+
+
+def test_failover_once_for_many_threads(offline_client):
+    client = offline_client(_responder, StandbyClient)
+    client.ws = DroppingSocket(_responder)
+    client.start_standby(ping_interval=10)
+    standby = client._standby
+    _wait(lambda: standby.ready)
+    client.start_io_thread()
+    client.ws.close()
+    results = []
+    threads = [threading.Thread(
+        target=lambda: results.append(client.get_symbol('EURUSD')))
+        for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    client.stop_io_thread()
+    assert results == [{'symbol': 'EURUSD'}] * 8
+    assert client.ws is client.sockets[0][1]
+    _wait(lambda: standby.built == 2)
+    client.stop_standby()
+    assert len(client.sockets) == 2
+
+
+class StallingSocket(FakeSocket):
+    """answers the login, never the pings"""
+    def __init__(self, responder):
+        super().__init__(responder)
+        self.release = threading.Event()
+
+    def recv(self):
+        if self.sent[-1]['command'] == 'ping':
+            self.release.wait(5)
+        return super().recv()
+
+
+def test_take_does_not_wait_for_ping():
+    ws = StallingSocket(_responder)
+    standby = StandbySession(lambda: ws, {'command': 'login'},
+                             ping_interval=0.01)
+    _wait(lambda: ws.sent and ws.sent[-1]['command'] == 'ping')
+    start = time.monotonic()
+    assert standby.take() is None
+    assert time.monotonic() - start < 0.1
+    ws.release.set()
+    _wait(lambda: standby.ready)
+    standby.stop()
+    assert not ws.connected
+
+
+def test_standby_needs_login():
+    with pytest.raises(NotLogged):
+        Client().start_standby()
@@ -0,0 +1,73 @@
+"""
+tests.test_symbols.py
+~~~~~~~
+
+test the symbol catalog
+"""
+
+import pytest
+
+from XTBApi.api import Client
+from XTBApi.symbols import SymbolCatalog
+from XTBApi.tests.fake import answer
+
+RECORDS = [
+    {'symbol': 'EURUSD', 'categoryName': 'FX', 'groupName': 'Major',
+     'currency': 'USD', 'longOnly': False, 'shortSelling': True},
+    {'symbol': 'EURPLN', 'categoryName': 'FX', 'groupName': 'Emergings',
+     'currency': 'PLN', 'longOnly': False, 'shortSelling': True},
+    {'symbol': 'AAPL.US_9', 'categoryName': 'STC', 'groupName': 'US',
+     'currency': 'USD', 'longOnly': True, 'shortSelling': False},
+    {'symbol': 'AAPL.US_4', 'categoryName': 'STC', 'groupName': 'US',
+     'currency': 'USD', 'longOnly': False, 'shortSelling': True},
+    {'symbol': 'O.US_9', 'categoryName': 'STC', 'groupName': 'US',
+     'currency': 'USD', 'longOnly': True, 'shortSelling': False},
+]
+
+
+def _names(records):
+    return [rec['symbol'] for rec in records]
+
+
+def test_lookups():
+    catalog = SymbolCatalog(RECORDS)
+    assert catalog.get('eurusd')['groupName'] == 'Major'
+    assert 'AAPL.US_4' in catalog
+    assert _names(catalog.prefix('EUR')) == ['EURPLN', 'EURUSD']
+    assert _names(catalog.prefix('aapl')) == ['AAPL.US_4', 'AAPL.US_9']
+    assert _names(catalog.fuzzy('EURUDS', limit=1)) == ['EURUSD']
+    assert set(_names(catalog.fuzzy('APPL.US'))) == {'AAPL.US_9', 'AAPL.US_4'}
+
+
+def test_select():
+    catalog = SymbolCatalog(RECORDS)
+    assert _names(catalog.select(currency='USD', category='FX')) == ['EURUSD']
+    assert _names(catalog.select(group='US', short_selling=True)) == \
+        ['AAPL.US_4']
+    assert catalog.select(category='IND') == []
+    assert len(catalog.select()) == 5
+
+
+def test_variants():
+    catalog = SymbolCatalog(RECORDS)
+    assert _names(catalog.variants('AAPL.US').values()) == \
+        ['AAPL.US_9', 'AAPL.US_4']
+    assert catalog.resolve('AAPL.US', 'cfd') == 'AAPL.US_4'
+    assert catalog.resolve('O.US') == 'O.US_9'
+    assert catalog.resolve('EURUSD') == 'EURUSD'
+    with pytest.raises(KeyError):
+        catalog.resolve('AAPL.US')
+    with pytest.raises(KeyError):
+        catalog.resolve('O.US', 'cfd')
+
+
+def test_cached(offline_client, tmp_path):
+    client = offline_client(lambda request: answer(RECORDS), Client)
+    filename = str(tmp_path / 'symbols.json')
+    catalog = SymbolCatalog.cached(client, filename)
+    assert len(catalog) == 5
+    again = SymbolCatalog.cached(client, filename)
+    assert len(client.ws.sent) == 1
+    assert again.records == catalog.records
+    SymbolCatalog.cached(client, filename, max_age=-1)
+    assert len(client.ws.sent) == 2
@@ -0,0 +1,92 @@
+"""
+tests.test_ticks.py
+~~~~~~~
+
+test the tick history ring buffers
+"""
+
+import pytest
+
+from XTBApi.ticks import TickBuffer, TickHistory
+
+
+def _fill(buffer, count, start=0):
+    for pos in range(start, start + count):
+        buffer.append(1000000 + pos * 250, 1.1 + pos / 1e5,
+                      1.1002 + pos / 1e5, 10.0, 30.0)
+
+
+def test_append_and_decode():
+    buffer = TickBuffer('EURUSD', 5, capacity=10)
+    _fill(buffer, 3)
+    window = buffer.window()
+    assert len(window) == 3
+    assert window.tick(2) == {'timestamp': 1000500, 'bid': 1.10002,
+                              'ask': 1.10022, 'bidVolume': 10.0,
+                              'askVolume': 30.0}
+
+
+def test_ring_keeps_last_ticks():
+    buffer = TickBuffer('EURUSD', 5, capacity=10)
+    _fill(buffer, 47)
+    assert len(buffer) == 10
+    window = buffer.window()
+    assert [window.tick(pos)['timestamp'] for pos in (0, 9)] == \
+        [1000000 + 37 * 250, 1000000 + 46 * 250]
+    assert len(buffer.time) == 15
+
+
+def test_window_is_zero_copy():
+    buffer = TickBuffer('EURUSD', 5, capacity=10)
+    _fill(buffer, 4)
+    window = buffer.window(2)
+    assert len(window) == 2
+    assert window.bid.obj is buffer.bid
+
+
+def test_statistics():
+    buffer = TickBuffer('EURUSD', 5, capacity=10)
+    _fill(buffer, 5)
+    window = buffer.window()
+    assert window.mean_spread() == pytest.approx(0.0002)
+    assert window.mean_mid() == pytest.approx(1.10012)
+    assert window.vwap() == pytest.approx(1.10012)
+    assert list(window.rolling_spread(2)) == pytest.approx([0.0002] * 4)
+    assert list(window.rolling_mid(4)) == pytest.approx([1.100115, 1.100125])
+
+
+def test_statistics_of_empty_window():
+    buffer = TickBuffer('EURUSD', 5, capacity=10)
+    window = buffer.window()
+    assert len(window) == 0
+    assert window.mean_spread() is None
+    assert window.mean_mid() is None
+    assert window.vwap() is None
+    assert len(window.rolling_mid(3)) == 0
+    _fill(buffer, 2)
+    assert len(buffer.window().rolling_spread(3)) == 0
+    with pytest.raises(ValueError):
+        buffer.window().rolling_mean('bid', 0)
+
+
+def test_rebase_on_large_moves():
+    buffer = TickBuffer('BITCOIN', 2, capacity=4)
+    buffer.append(1000, 10.0, 10.5)
+    buffer.append(2000, 30000000.0, 30000000.5)
+    buffer.append(2 ** 33, 30000001.0, 30000001.5)
+    window = buffer.window()
+    assert window.tick(1)['bid'] == 30000000.0
+    assert window.tick(2) == {'timestamp': 2 ** 33, 'bid': 30000001.0,
+                              'ask': 30000001.5, 'bidVolume': 0.0,
+                              'askVolume': 0.0}
+
+
+def test_history_from_quotations():
+    history = TickHistory.from_symbols(
+        [{'symbol': 'EURUSD', 'precision': 5}], capacity=100)
+    history.add_quotations([{'symbol': 'EURUSD', 'timestamp': 1000,
+                             'bid': 1.1, 'ask': 1.1001, 'bidVolume': 5,
+                             'askVolume': None}])
+    assert 'EURUSD' in history
+    assert history.window('EURUSD').tick(0)['ask'] == pytest.approx(1.1001)
+    assert history.nbytes() == 150 * 20
@@ -0,0 +1,227 @@
+# -*- coding utf-8 -*-
+
+"""
+XTBApi.ticks
+~~~~~~~
+
+Compact per symbol tick history in fixed size ring buffers
+"""
+
+import itertools
+import operator
+from array import array
+
+INT32_MIN = -2 ** 31
+INT32_MAX = 2 ** 31 - 1
+# extra room after the capacity, see TickBuffer
+SLACK_RATIO = 0.5
+
+
+class TickWindow(object):
+    """the last ticks of a TickBuffer as zero-copy memoryviews
+
+    prices are integers in units of 10 ** -precision relative to
+    base_price, ask is stored as the spread over bid and timestamps are
+    milliseconds from base_time. the views are valid until the buffer
+    receives new ticks"""
+    def __init__(self, buffer, start, end):
+        self.scale = buffer.scale
+        self.base_price = buffer.base_price
+        self.base_time = buffer.base_time
+        self.time = memoryview(buffer.time)[start:end]
+        self.bid = memoryview(buffer.bid)[start:end]
+        self.spread = memoryview(buffer.spread)[start:end]
+        self.bid_volume = memoryview(buffer.bid_volume)[start:end]
+        self.ask_volume = memoryview(buffer.ask_volume)[start:end]
+
+    def __len__(self):
+        return len(self.time)
+
+    def tick(self, index):
+        """one tick decoded as a dict, timestamp in milliseconds"""
+        bid = (self.base_price + self.bid[index]) / self.scale
+        return {'timestamp': self.base_time + self.time[index], 'bid': bid,
+                'ask': bid + self.spread[index] / self.scale,
+                'bidVolume': self.bid_volume[index],
+                'askVolume': self.ask_volume[index]}
+
+    def mean_spread(self):
+        """None on an empty window, like vwap()"""
+        if not len(self):
+            return None
+        return sum(self.spread) / len(self) / self.scale
+
+    def mean_mid(self):
+        if not len(self):
+            return None
+        total = sum(self.bid) + sum(self.spread) / 2
+        return (self.base_price + total / len(self)) / self.scale
+
+    def vwap(self):
+        """mid price weighted by the bid and ask volumes"""
+        volumes = list(map(operator.add, self.bid_volume, self.ask_volume))
+        total_volume = sum(volumes)
+        if not total_volume:
+            return None
+        doubled_mids = map(operator.add, map(operator.add, self.bid, self.bid),
+                           self.spread)
+        weighted = sum(map(operator.mul, doubled_mids, volumes))
+        return (self.base_price + weighted / total_volume / 2) / self.scale
+
+    def rolling_mean(self, column, length):
+        """means of column over each run of length ticks, as array('d')
+        column is one of 'bid', 'spread', 'bid_volume', 'ask_volume',
+        prices are not rescaled. empty when the window is shorter than
+        length"""
+        if length < 1:
+            raise ValueError(f"length {length} must be at least 1")
+        values = getattr(self, column)
+        sums = [0]
+        sums.extend(itertools.accumulate(values))
+        return array('d', ((sums[pos + length] - sums[pos]) / length
+                           for pos in range(len(values) - length + 1)))
+
+    def rolling_spread(self, length):
+        """rolling mean spread in price units"""
+        return array('d', (value / self.scale for value in
+                           self.rolling_mean('spread', length)))
+
+    def rolling_mid(self, length):
+        """rolling mean mid price"""
+        bids = self.rolling_mean('bid', length)
+        spreads = self.rolling_mean('spread', length)
+        return array('d', ((self.base_price + bid + spread / 2) / self.scale
+                           for bid, spread in zip(bids, spreads)))
+
+
+class TickBuffer(object):
+    """ring buffer of the last capacity ticks of one symbol
+
+    columns are typed arrays: int32 prices scaled by the symbol precision
+    and relative to a base price, ask as an int32 spread over bid, uint32
+    milliseconds from a base time and float32 volumes, 20 bytes a tick.
+    the arrays hold capacity * (1 + SLACK_RATIO) ticks, once the end is
+    reached the last capacity ticks are moved to the front, so appending
+    is amortised O(1) and every window is contiguous"""
+    def __init__(self, symbol, precision, capacity):
+        self.symbol = symbol
+        self.scale = 10 ** precision
+        self.capacity = capacity
+        size = capacity + max(1, int(capacity * SLACK_RATIO))
+        self.time = array('I', bytes(4 * size))
+        self.bid = array('i', bytes(4 * size))
+        self.spread = array('i', bytes(4 * size))
+        self.bid_volume = array('f', bytes(4 * size))
+        self.ask_volume = array('f', bytes(4 * size))
+        self.base_price = None
+        self.base_time = None
+        self._start = 0
+        self._end = 0
+
+    def _columns(self):
+        return (self.time, self.bid, self.spread, self.bid_volume,
+                self.ask_volume)
+
+    def append(self, timestamp, bid, ask, bid_volume=0.0, ask_volume=0.0):
+        """add a tick, timestamp in milliseconds"""
+        price = round(bid * self.scale)
+        if self.base_price is None:
+            self.base_price = price
+            self.base_time = int(timestamp)
+        offset = price - self.base_price
+        if not INT32_MIN <= offset <= INT32_MAX:
+            self._rebase_price(price)
+            offset = 0
+        elapsed = int(timestamp) - self.base_time
+        if not 0 <= elapsed < 2 ** 32:
+            self._rebase_time(int(timestamp))
+            elapsed = max(0, int(timestamp) - self.base_time)
+        if self._end == len(self.time):
+            self._compact()
+        pos = self._end
+        self.time[pos] = elapsed
+        self.bid[pos] = offset
+        self.spread[pos] = round(ask * self.scale) - price
+        self.bid_volume[pos] = bid_volume or 0.0
+        self.ask_volume[pos] = ask_volume or 0.0
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def append_quote(self, quote):
+        """add a quotation of a getTickPrices response"""
+        self.append(quote['timestamp'], quote['bid'], quote['ask'],
+                    quote.get('bidVolume'), quote.get('askVolume'))
+
+    def _compact(self):
+        """move the live ticks to the front of the arrays"""
+        count = self._end - self._start
+        for column in self._columns():
+            column[0:count] = column[self._start:self._end]
+        self._start, self._end = 0, count
+
+    def _rebase_price(self, price):
+        """a move of more than 2 ** 31 units clamps the older prices"""
+        shift = price - self.base_price
+        for pos in range(self._start, self._end):
+            self.bid[pos] = max(INT32_MIN, self.bid[pos] - shift)
+        self.base_price = price
+
+    def _rebase_time(self, timestamp):
+        """count from the oldest tick kept, older than 49 days are clamped"""
+        oldest = self.base_time + self.time[self._start] if len(self) else \
+            timestamp
+        base = min(oldest, timestamp)
+        if timestamp - base >= 2 ** 32:
+            base = timestamp - 2 ** 32 + 1
+        shift = base - self.base_time
+        for pos in range(self._start, self._end):
+            self.time[pos] = min(2 ** 32 - 1, max(0, self.time[pos] - shift))
+        self.base_time = base
+
+    def window(self, count=None):
+        """TickWindow of the last count ticks, all of them by default"""
+        count = len(self) if count is None else min(count, len(self))
+        return TickWindow(self, self._end - count, self._end)
+
+    def nbytes(self):
+        return sum(col.itemsize * len(col) for col in self._columns())
+
+    def __len__(self):
+        return self._end - self._start
+
+
+class TickHistory(object):
+    """TickBuffer of every symbol, created on their first tick
+    precisions maps each symbol to its price precision"""
+    def __init__(self, precisions, capacity):
+        self.precisions = precisions
+        self.capacity = capacity
+        self.buffers = {}
+
+    @classmethod
+    def from_symbols(cls, records, capacity):
+        """precisions from getAllSymbols records"""
+        return cls({rec['symbol']: rec['precision'] for rec in records},
+                   capacity)
+
+    def buffer(self, symbol):
+        buffer = self.buffers.get(symbol)
+        if buffer is None:
+            buffer = self.buffers[symbol] = TickBuffer(
+                symbol, self.precisions[symbol], self.capacity)
+        return buffer
+
+    def add_quotations(self, quotations):
+        """add the quotations of a getTickPrices response"""
+        for quote in quotations:
+            self.buffer(quote['symbol']).append_quote(quote)
+
+    def window(self, symbol, count=None):
+        return self.buffers[symbol].window(count)
+
+    def nbytes(self):
+        return sum(buffer.nbytes() for buffer in self.buffers.values())
+
+    def __contains__(self, symbol):
+        return symbol in self.buffers
@@ -0,0 +1,63 @@
+"""
+benchmarks.bench_backtest.py
+~~~~~~~
+
+candles per second replayed through PaperClient by a moving average
+strategy written against the Client interface
+
+    $ python benchmarks/bench_backtest.py [candles]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XTBApi.backtest import Broker, PaperClient  # noqa: E402
+
+
+def random_walk(count, price=100.0):
+    random.seed(0)
+    candles = []
+    for step in range(count):
+        close = max(1.0, price + random.gauss(0, 0.5))
+        candles.append({'timestamp': 86400 + step * 60, 'open': price,
+                        'high': max(price, close) + 0.2,
+                        'low': min(price, close) - 0.2, 'close': close,
+                        'volume': 100})
+        price = close
+    return candles
+
+
+def strategy(client, closes):
+    """buy when the fast average crosses above the slow one"""
+    fast = sum(closes[-10:]) / 10
+    slow = sum(closes[-50:]) / 50
+    if fast > slow and not client.trade_rec:
+        client.open_trade('buy', 'ABC', dollars=1000, tp_per=0.02, sl_per=0.01)
+    elif fast < slow and client.trade_rec:
+        client.close_all_trades()
+
+
+def run(count):
+    broker = Broker({'ABC': {'spreadRaw': 0.02}})
+    broker.load_candles('ABC', random_walk(count))
+    client = PaperClient(broker)
+    client.login()
+    closes = []
+    start = time.perf_counter()
+    for _ in broker.replay():
+        closes.append(broker.prices['ABC']['bid'])
+        if len(closes) >= 50:
+            strategy(client, closes)
+    return time.perf_counter() - start, len(broker.history)
+
+
+if __name__ == '__main__':
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    elapsed, trades = run(COUNT)
+    print(f"{COUNT} candles, {trades} trades in {elapsed:.2f} s: "
+          f"{COUNT / elapsed:.0f} candles/s "
+          f"({COUNT * 60 / elapsed:.0f}x real time on 1 minute candles)")
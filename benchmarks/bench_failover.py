@@ -0,0 +1,104 @@
+"""
+benchmarks.bench_failover.py
+~~~~~~~
+
+time of the first request after the server drops the connection, logging
+in again against swapping in the hot standby session. the stand-in server
+adds a handshake and a round trip latency to in-process sockets
+
+    $ python benchmarks/bench_failover.py [drops]
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import XTBApi.api  # noqa: E402
+
+HANDSHAKE = 0.150   # tcp + tls + websocket upgrade
+ROUND_TRIP = 0.020
+
+
+class StandInServer(object):
+    """opens latency adding sockets, drop() resets the active ones"""
+    def __init__(self):
+        self.sockets = []
+
+    def connect(self):
+        time.sleep(HANDSHAKE)
+        ws = StandInSocket()
+        self.sockets.append(ws)
+        return ws
+
+    def drop(self, ws):
+        ws.dropped = True
+
+
+class StandInSocket(object):
+    def __init__(self):
+        self.dropped = False
+        self._pending = None
+
+    def send(self, frame):
+        if self.dropped:
+            raise ConnectionResetError("connection reset by peer")
+        request = json.loads(frame)
+        time.sleep(ROUND_TRIP)
+        if request['command'] in ('login', 'ping'):
+            self._pending = json.dumps({'status': True})
+        else:
+            self._pending = json.dumps({'status': True, 'returnData': {
+                'symbol': request['arguments']['symbol']}})
+
+    def recv(self):
+        return self._pending
+
+    def close(self):
+        self.dropped = True
+
+
+class BenchClient(XTBApi.api.Client):
+    def __init__(self, server):
+        super().__init__()
+        self.server = server
+
+    def _connect(self, mode, timeout=None):
+        return self.server.connect()
+
+
+def run(drops, standby):
+    XTBApi.api.MAX_TIME_INTERVAL = 0
+    server = StandInServer()
+    client = BenchClient(server)
+    client.max_time_interval = 0
+    client.login('user', 'password')
+    if standby:
+        client.start_standby(ping_interval=1)
+    timings = []
+    for _ in range(drops):
+        if standby:
+            while not client._standby.ready:  # pylint: disable=protected-access
+                time.sleep(0.01)
+        server.drop(client.ws)
+        start = time.perf_counter()
+        client.get_symbol('EURUSD')
+        timings.append(time.perf_counter() - start)
+    client.stop_standby()
+    return timings
+
+
+def main():
+    drops = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"handshake {HANDSHAKE * 1000:.0f} ms, round trip "
+          f"{ROUND_TRIP * 1000:.0f} ms, {drops} drops")
+    for name, standby in (('login again', False), ('hot standby', True)):
+        timings = run(drops, standby)
+        print(f"{name:12s} mean {sum(timings) / drops * 1000:7.1f} ms  "
+              f"max {max(timings) * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+benchmarks.bench_import.py
+~~~~~~~
+
+measure the time needed to import XTBApi.api in a fresh interpreter
+
+    $ python benchmarks/bench_import.py [runs]
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+CODE = "import XTBApi.api"
+
+
+def bench(runs):
+    baseline = []
+    package = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        baseline.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', CODE], check=True)
+        package.append(time.perf_counter() - start)
+    return statistics.median(baseline), statistics.median(package)
+
+
+if __name__ == '__main__':
+    RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    interpreter, with_import = bench(RUNS)
+    print(f"interpreter startup: {interpreter * 1000:.1f} ms")
+    print(f"import XTBApi.api:   {(with_import - interpreter) * 1000:.1f} ms")
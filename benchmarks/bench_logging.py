@@ -0,0 +1,52 @@
+"""
+benchmarks.bench_logging.py
+~~~~~~~
+
+commands per second with logging disabled, to file and to a queued file
+
+    $ python benchmarks/bench_logging.py [seconds]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import XTBApi  # noqa: E402
+from XTBApi.tests.fake import offline_client  # noqa: E402
+
+SYMBOLS = [{'symbol': f"SYM{x}", 'ask': 1.1, 'bid': 1.0, 'lotStep': 0.01,
+            'description': 'symbol description'} for x in range(200)]
+
+
+def responder(request):
+    if request['command'] == 'getAllSymbols':
+        return {'status': True, 'returnData': SYMBOLS}
+    return {'status': True, 'returnData': {'order': 1}}
+
+
+def commands_per_second(duration):
+    client = offline_client(responder)
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        client.trade_transaction('EURUSD', 0, 0, 1.0, price=1.1)
+        client.get_all_symbols()
+        count += 2
+    return count / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    DURATION = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    logfile = os.path.join(tempfile.mkdtemp(), 'bench.log')
+    print(f"logging off:        {commands_per_second(DURATION):8.0f} cmd/s")
+    XTBApi.setup_logging(logfile, 'DEBUG')
+    print(f"DEBUG to file:      {commands_per_second(DURATION):8.0f} cmd/s")
+    XTBApi.setup_logging(logfile, 'DEBUG', queued=True)
+    print(f"DEBUG queued file:  {commands_per_second(DURATION):8.0f} cmd/s")
+    XTBApi.setup_logging(logfile, 'INFO', queued=True)
+    print(f"INFO queued file:   {commands_per_second(DURATION):8.0f} cmd/s")
+    logging.shutdown()
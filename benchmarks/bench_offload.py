@@ -0,0 +1,74 @@
+"""
+benchmarks.bench_offload.py
+~~~~~~~
+
+time the thread owning the socket is blocked by a large getAllSymbols
+and getChartRangeRequest, inline decoding against the offload pools
+
+    $ python benchmarks/bench_offload.py [rounds]
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XTBApi.offload import OffloadPool, candles_columns, symbols_columns  # noqa: E402
+from XTBApi.tests.fake import offline_client  # noqa: E402
+
+SYMBOLS = [{'symbol': f"SYM{x}", 'ask': 1.5, 'bid': 1.25, 'high': 2.0,
+            'low': 1.0, 'lotStep': 0.01, 'lotMin': 0.01, 'lotMax': 100.0,
+            'precision': 2, 'contractSize': 1, 'leverage': 10,
+            'spreadRaw': 0.25, 'time': 1700000000000, 'currency': 'USD',
+            'categoryName': 'STC', 'groupName': 'US',
+            'description': 'a listed company'} for x in range(20000)]
+CANDLES = {'digits': 5, 'rateInfos': [
+    {'ctm': (1600000000 + x * 60) * 1000, 'open': 110000 + x % 50,
+     'close': 5, 'high': 10, 'low': -10, 'vol': 3.0} for x in range(200000)]}
+
+
+FRAMES = {
+    'getAllSymbols': json.dumps({'status': True, 'returnData': SYMBOLS}),
+    'getChartRangeRequest': json.dumps({'status': True,
+                                        'returnData': CANDLES}),
+}
+
+
+def responder(request):
+    return FRAMES[request['command']]
+
+
+def inline(client):
+    blocked = time.perf_counter()
+    symbols_columns(client.get_all_symbols())
+    candles_columns(client.get_chart_range_request('EURUSD', 1, 0, 1, 0))
+    return time.perf_counter() - blocked, 0.0
+
+
+def offloaded(client, pool):
+    blocked = time.perf_counter()
+    futures = [pool.all_symbols(client),
+               pool.chart_range(client, 'EURUSD', 1, 0, 1)]
+    blocked = time.perf_counter() - blocked
+    start = time.perf_counter()
+    for future in futures:
+        future.result().close()
+    return blocked, time.perf_counter() - start
+
+
+def report(name, runs):
+    blocked = sum(run[0] for run in runs) / len(runs)
+    waited = sum(run[1] for run in runs) / len(runs)
+    print(f"{name:8s} socket thread blocked {blocked * 1000:7.1f} ms, "
+          f"then waiting for results {waited * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    CLIENT = offline_client(responder)
+    report('inline', [inline(CLIENT) for _ in range(ROUNDS)])
+    for KIND in ('thread', 'process'):
+        with OffloadPool(KIND, max_workers=2, threshold=1024) as POOL:
+            report(KIND, [offloaded(CLIENT, POOL) for _ in range(ROUNDS)])
@@ -27,7 +27,8 @@ REQUIRED = [
 
 # What packages are optional?
 EXTRAS = {
-    'test': ['pytest']
+    'test': ['pytest'],
+    'parquet': ['pyarrow'],
     # 'fancy feature': ['django'],
 }
 